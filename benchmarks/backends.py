@@ -0,0 +1,206 @@
+"""
+BLS aggregation on each analytics_backend, checked for equivalence first.
+
+Every backend starts from the same Parquet file, like a warm run served by
+the BLS cache:
+
+    pandas   pq.read_table, to_bls_frame, aggregate_bls
+    arrow    pq.read_table, arrow_aggregate_bls
+    duckdb   duckdb_aggregate_bls straight over the file
+
+Totals, lookup rows and best years must match the pandas backend (totals
+to a relative 1e-9, as the summation order differs) before anything is
+timed; a mismatch exits non-zero. Each backend is then timed in a fresh
+interpreter so its peak RSS is its own.
+
+bls_report_mode=stream is held to the same check: stream_aggregate_bls
+reads the file, gzipped and plain as ingestion stores it, from a moto
+bucket in --stream-block sized batches, so many batches are merged, and
+must match aggregate_bls(read_bls(...)) over the same object.
+
+bls_report_mode=incremental is checked the same way: a plain file is stored
+with the block hashes ingestion records for delta-synced files, then
+appended to, revised at the tail and mid-file, and shrunk. After every edit
+incremental_aggregate_bls must update its per-block state rather than fall
+back to a full pass, and its lookup rows and best years must match
+aggregate_bls(read_bls(...)).
+
+    pip install duckdb -r benchmarks/requirements.txt
+    python benchmarks/backends.py --series 1000 10000 50000
+"""
+import argparse, hashlib, io, json, os, subprocess, sys, tempfile
+from typing import Optional
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+sys.path.insert(0, os.path.dirname(__file__))
+
+# Bucket the stream check reads from, served by moto
+for name, value in {"s3_bucket": "rearc-benchmark", "s3_bls_key": "bls/pr", "AWS_DEFAULT_REGION": "us-east-1",
+                    "AWS_ACCESS_KEY_ID": "bench", "AWS_SECRET_ACCESS_KEY": "bench"}.items():
+    os.environ.setdefault(name, value)
+
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+import synthetic
+from measure import timed, peak_rss_mb
+from analytics import analytics_rearc_lambda as analytics
+
+BACKENDS = ["pandas", "arrow", "duckdb"]
+
+# The report's lookup plus ranges and wildcards, so every filter shape is compared
+LOOKUPS = [
+    {"series_id": "PRS30006032", "year": 2018, "period": "Q01"},
+    {"series_id": "PRS30006012", "year": [2010, 2015]},
+    {"series_id": "PRS30006042", "period": "Q05"},
+    {"series_id": "PRS30000000"},
+    {"series_id": "NOT-A-SERIES", "year": 2018},
+]
+
+def run(backend: str, path: str):
+    if backend == "duckdb":
+        return analytics.duckdb_aggregate_bls(path, LOOKUPS)
+    table = pq.read_table(path, columns=analytics.BLS_COLUMNS)
+    if backend == "arrow":
+        return analytics.arrow_aggregate_bls(table, LOOKUPS)
+    return analytics.aggregate_bls(analytics.to_bls_frame(table), LOOKUPS)
+
+def normalise(df: pd.DataFrame, keys: list) -> pd.DataFrame:
+    df = df.astype({"series_id": str, "year": "int64"})
+    if "period" in df:
+        df = df.astype({"period": str})
+    return df.sort_values(keys).reset_index(drop=True)
+
+def check(expected, actual, backend: str, best: Optional[pd.DataFrame] = None) -> None:
+    """
+    Raise when a backend's totals, lookup rows or best years differ from
+    pandas. Incremental mode returns no totals, its best years are passed in.
+    """
+    (exp_grouped, exp_lookup), (act_grouped, act_lookup) = expected, actual
+    keys = ["series_id", "year"]
+
+    exp_grouped = normalise(exp_grouped, keys)
+    if act_grouped is not None:
+        act_grouped = normalise(act_grouped, keys)
+        if not exp_grouped[keys].equals(act_grouped[keys]) or not np.allclose(
+                exp_grouped["total_value"], act_grouped["total_value"], rtol=1e-9, atol=0):
+            raise AssertionError(f"{backend}: totals differ from pandas")
+
+    exp_lookup = normalise(exp_lookup, ["series_id", "year", "period"])
+    act_lookup = normalise(act_lookup, ["series_id", "year", "period"])
+    if not exp_lookup.astype({"value": "float64"}).equals(act_lookup.astype({"value": "float64"})):
+        raise AssertionError(f"{backend}: lookup rows differ from pandas")
+
+    exp_best = normalise(analytics.best_years(exp_grouped), keys)
+    act_best = normalise(analytics.best_years(act_grouped) if best is None else best, keys)
+    if not exp_best[keys].equals(act_best[keys]) or not np.allclose(
+            exp_best["total_value"], act_best["total_value"], rtol=1e-9, atol=0):
+        raise AssertionError(f"{backend}: best years differ from pandas")
+
+def check_stream(series: int, block_size: int) -> None:
+    """Raise when stream mode, gzipped or plain, differs from aggregate_bls over read_bls"""
+    for encoding, compress in [("gzip", True), ("plain", False)]:
+        file_name = f"s{series}.{encoding}"
+        analytics.get_s3().put_object(Bucket=analytics.S3_BUCKET, Key=f"{analytics.S3_BLS}/{file_name}",
+                                      Body=synthetic.bls_bytes(series, compress=compress))
+
+        expected = analytics.aggregate_bls(analytics.read_bls(file_name), LOOKUPS)
+        check(expected, analytics.stream_aggregate_bls(file_name, LOOKUPS, block_size), f"stream ({encoding})")
+
+def bls_row(series_id: str, year: int, period: str, value: float) -> bytes:
+    return f"{series_id:<30}\t{year}\t{period}\t{value:12.3f}\t\n".encode()
+
+def publish_blocks(file_name: str, raw: bytes, block_size: int) -> None:
+    """Store a plain BLS file with the block hashes ingestion records for delta-synced files"""
+    s3 = analytics.get_s3()
+    s3.put_object(Bucket=analytics.S3_BUCKET, Key=f"{analytics.S3_BLS}/{file_name}", Body=raw)
+
+    blocks = [hashlib.sha256(raw[start:start + block_size]).hexdigest() for start in range(0, len(raw), block_size)]
+    manifest = {"files": {file_name: {"size": len(raw), "encoding": "identity", "blocks": blocks, "block_size": block_size}}}
+    s3.put_object(Bucket=analytics.S3_BUCKET, Key=analytics.bls_manifest_key(analytics.S3_BLS), Body=json.dumps(manifest))
+
+def check_incremental(series: int, block_size: int) -> None:
+    """Raise when incremental mode, after each kind of edit, differs from aggregate_bls over read_bls"""
+    file_name = f"s{series}.incremental"
+    s3 = analytics.get_s3()
+
+    # State left by another file size would be reused wherever its blocks happen to match
+    for page in s3.get_paginator("list_objects_v2").paginate(Bucket=analytics.S3_BUCKET, Prefix=f"{analytics.S3_STATE}/"):
+        for obj in page.get("Contents", []):
+            s3.delete_object(Bucket=analytics.S3_BUCKET, Key=obj["Key"])
+
+    def revise(raw: bytes, at: int) -> bytes:
+        # Replace the value of the row starting at or after `at`, 12 characters wide
+        # after the padded series id, year and period, so every offset is kept
+        value = raw.index(b"\n", at) + 1 + 31 + 5 + 4
+        return raw[:value] + f"{999999.999:12.3f}".encode() + raw[value + 12:]
+
+    edits = [
+        ("first run", lambda raw: raw),
+        ("append", lambda raw: raw + b"".join(bls_row("PRS99999999", 2025, period, 1.5) for period in synthetic.PERIODS)),
+        ("tail revision", lambda raw: raw[:raw.rindex(b"\n", 0, -1) + 1] + bls_row("PRS99999999", 2025, "Q05", 900.0)),
+        ("mid-file revision", lambda raw: revise(raw, len(raw) // 2)),
+        ("shrink", lambda raw: raw[:raw.index(b"\n", len(raw) // 3) + 1]),
+    ]
+
+    raw = synthetic.bls_bytes(series, compress=False)
+    for label, edit in edits:
+        raw = edit(raw)
+        publish_blocks(file_name, raw, block_size)
+
+        expected = analytics.aggregate_bls(analytics.read_bls(file_name), LOOKUPS)
+        grouped, lookup, best = analytics.incremental_aggregate_bls(file_name, LOOKUPS)
+        if grouped is not None:
+            raise AssertionError(f"incremental ({label}): aggregated in full instead of by block")
+        check(expected, (None, lookup), f"incremental ({label})", best=best)
+
+def measure(backend: str, path: str, runs: int) -> dict:
+    """Time one backend in a fresh interpreter and return its median and peak RSS"""
+    out = subprocess.run(
+        [sys.executable, __file__, "--measure", backend, path, "--runs", str(runs)],
+        capture_output=True, text=True
+    )
+    if out.returncode != 0:
+        raise RuntimeError(f"{backend} failed:\n{out.stderr}")
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--series", type=int, nargs="+", default=[1000, 10000, 50000])
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--backends", nargs="+", choices=BACKENDS, default=BACKENDS)
+    parser.add_argument("--stream-block", type=int, default=64 * 1024,
+                        help="bls_block_size of the stream check, small so many batches are merged")
+    parser.add_argument("--incremental-block", type=int, default=256 * 1024,
+                        help="block size recorded for the incremental check, small so edits leave most blocks clean")
+    parser.add_argument("--measure", nargs=2, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.measure:
+        backend, path = args.measure
+        ms = timed(run, backend, path, runs=args.runs)
+        return print(json.dumps({"ms": ms, "peak_rss_mb": peak_rss_mb()}))
+
+    from moto import mock_aws
+
+    print(f"{'rows':>10} {'backend':<8} {'ms':>8} {'rss MB':>7}")
+    with tempfile.TemporaryDirectory() as directory, mock_aws():
+        analytics.get_s3().create_bucket(Bucket=analytics.S3_BUCKET)
+
+        for series in args.series:
+            path = os.path.join(directory, f"s{series}.parquet")
+            table = analytics.parse_bls_arrow(io.BytesIO(synthetic.bls_bytes(series)), analytics.BLS_FIELDS)
+            pq.write_table(table, path, compression="zstd")
+
+            expected = run("pandas", path)
+            for backend in args.backends:
+                check(expected, run(backend, path), backend)
+            check_stream(series, args.stream_block)
+            check_incremental(series, args.incremental_block)
+
+            for backend in args.backends:
+                result = measure(backend, path, args.runs)
+                print(f"{len(table):>10} {backend:<8} {result['ms']:>8.1f} {result['peak_rss_mb']:>7.0f}")
+
+if __name__ == "__main__":
+    main()
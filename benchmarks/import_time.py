@@ -0,0 +1,52 @@
+"""
+Cold-start benchmark for the Lambda handler modules.
+
+Every sample imports a handler module in a fresh interpreter, which is what
+a Lambda cold start pays before the first invocation. Point --src at another
+checkout (e.g. a `git worktree` of an older commit) to compare before/after.
+
+    python benchmarks/import_time.py --runs 10
+    python benchmarks/import_time.py --src /tmp/baseline/src
+"""
+import argparse, json, os, statistics, subprocess, sys
+
+MODULES = ["functions.client_rearc_lambda", "analytics.analytics_rearc_lambda"]
+HEAVY   = ["pandas", "pyarrow", "bs4", "boto3", "requests"]
+
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+__import__(sys.argv[1])
+elapsed = time.perf_counter() - start
+print(json.dumps({"ms": elapsed * 1000, "loaded": [m for m in sys.argv[2:] if m in sys.modules]}))
+"""
+
+def measure(src: str, module: str, runs: int) -> dict:
+    """Median import time of a module across fresh interpreters"""
+    env = dict(os.environ, PYTHONPATH=src, AWS_DEFAULT_REGION=os.environ.get("AWS_DEFAULT_REGION", "us-east-1"))
+    samples, loaded = [], []
+
+    for _ in range(runs):
+        out = subprocess.run(
+            [sys.executable, "-c", PROBE, module, *HEAVY],
+            env=env, capture_output=True, text=True, check=True
+        )
+        result = json.loads(out.stdout.strip().splitlines()[-1])
+        samples.append(result["ms"])
+        loaded = result["loaded"]
+
+    return {"module": module, "median_ms": statistics.median(samples), "min_ms": min(samples), "loaded": loaded}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--src", default=os.path.join(os.path.dirname(__file__), "..", "src"))
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'module':<36} {'median ms':>10} {'min ms':>8}  heavy modules loaded")
+    for module in MODULES:
+        result = measure(os.path.abspath(args.src), module, args.runs)
+        print(f"{result['module']:<36} {result['median_ms']:>10.1f} {result['min_ms']:>8.1f}  {', '.join(result['loaded']) or '-'}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,22 @@
+"""
+Timing and memory helpers shared by the benchmark scripts.
+"""
+import statistics, sys, time
+
+def timed(fn, *args, runs: int) -> float:
+    """Median wall time of `runs` calls in milliseconds"""
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn(*args)
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1000
+
+def peak_rss_mb() -> float:
+    """Peak RSS of this process; ru_maxrss on Linux keeps the forking parent's peak across exec"""
+    try:
+        with open("/proc/self/status") as f:
+            return next(int(line.split()[1]) for line in f if line.startswith("VmHWM")) / 1024
+    except OSError:
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024 / (1024 if sys.platform == "darwin" else 1)
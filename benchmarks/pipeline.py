@@ -0,0 +1,355 @@
+"""
+End-to-end benchmark of both Lambdas against local stand-ins.
+
+    - download.bls.gov / datausa.io: a local HTTP server serving synthetic
+      files from benchmarks/synthetic.py, with ETag, Last-Modified, 304s and ranges
+    - S3: a moto server (or any S3 compatible endpoint via --s3-endpoint)
+
+Every phase runs in a fresh interpreter, like a cold Lambda container, so
+peak RSS and the module level worker settings are per phase:
+
+    client-cold      first sync into an empty bucket
+    client-warm      second sync with nothing changed upstream
+    analytics-cold   direct analytics run, BLS parse cache empty
+    analytics-warm   direct analytics run, BLS parse cache populated
+
+With --delta, pr.data.0.Current is synced by block delta (bls_delta_files,
+5 MB blocks) and a scratch copy of it is edited before every client run
+after the first one:
+
+    client-append    rows appended
+    client-revise    the last row replaced
+    client-spot      one byte changed in the block the spot check reads
+    client-shrink    cut below the last stored block, so the probe gets a 416
+    client-regrow    rows appended after the shrink
+
+After each run the S3 object must equal the decoded source byte for byte;
+a mismatch exits non-zero.
+
+    pip install -r benchmarks/requirements.txt
+    python benchmarks/pipeline.py --series 1000 10000 --workers 1 8
+    python benchmarks/pipeline.py --series 3000 --workers 8 --delta
+"""
+import argparse, email.utils, gzip, json, os, shutil, socket, subprocess, sys, tempfile, threading, time
+from collections import Counter
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(__file__))
+import synthetic
+from measure import peak_rss_mb
+
+SRC      = os.path.join(os.path.dirname(__file__), "..", "src")
+BLS_PATH = "/pub/time.series/pr/"
+PHASES   = ["client-cold", "client-warm", "analytics-cold", "analytics-warm"]
+DELTA_PHASES = ["client-cold", "client-append", "client-revise", "client-spot", "client-shrink", "client-regrow"]
+DELTA_BLOCK  = 5 * 1024 * 1024
+
+# Small lookup files published next to the data files
+LOOKUPS = {
+    "pr.class": "class_code\tclass_text\n6\tAll workers\n",
+    "pr.duration": "duration_code\tduration_text\n1\t% Change same quarter 1 year ago\n",
+    "pr.footnote": "footnote_code\tfootnote_text\nR\tRevised\n",
+    "pr.period": "period\tperiod_abbr\tperiod_name\nQ01\tQTR1\t1st Quarter\n",
+}
+
+def build_dataset(root: str, series: int) -> str:
+    """Write a synthetic pr survey directory once per size and return its path"""
+    directory = os.path.join(root, f"s{series}", BLS_PATH.strip("/"))
+    data_file = os.path.join(directory, "pr.data.0.Current")
+    if os.path.exists(data_file):
+        return directory
+
+    os.makedirs(directory, exist_ok=True)
+    for name, text in LOOKUPS.items():
+        with open(os.path.join(directory, name), "wb") as f:
+            f.write(gzip.compress(text.encode()))
+
+    # Written under a temporary name so an interrupted run is regenerated
+    with open(data_file + ".tmp", "wb") as f:
+        synthetic.write_bls(f, series)
+    os.replace(data_file + ".tmp", data_file)
+    return directory
+
+def appended(raw: bytes, year: int) -> bytes:
+    return raw + "".join(f"{'PRS99999999':<30}\t{year}\t{period}\t{1.5:12.3f}\t\n" for period in synthetic.PERIODS).encode()
+
+def spot_offset(stored: dict) -> int:
+    """Offset in the block delta_file spot checks next, which is never the last one"""
+    return stored.get("deltas", 0) % max(len(stored["blocks"]) - 1, 1) * stored["block_size"] + 7
+
+# Edits made to the source before each --delta phase, from its bytes and the stored manifest entry
+DELTA_EDITS = {
+    "client-append": lambda raw, stored: appended(raw, 2030),
+    "client-revise": lambda raw, stored: raw[:raw.rindex(b"\n", 0, -1) + 1] + appended(b"", 2031),
+    "client-spot": lambda raw, stored: appended(raw[:spot_offset(stored)] + b"#" + raw[spot_offset(stored) + 1:], 2032),
+    "client-shrink": lambda raw, stored: raw[:raw.index(b"\n", (len(stored["blocks"]) - 1) * stored["block_size"] // 2) + 1],
+    "client-regrow": lambda raw, stored: appended(raw, 2033),
+}
+
+class SourceHandler(BaseHTTPRequestHandler):
+    """download.bls.gov and datausa.io stand-in; files are stored gzipped and sent with Content-Encoding: gzip when accepted"""
+    protocol_version = "HTTP/1.1"
+    directory = ""
+    census_latency = 0.0
+    requests = Counter()
+    lock = threading.Lock()
+
+    def do_GET(self):
+        if self.path.startswith("/census"):
+            time.sleep(self.census_latency)
+            return self.send_body(200, synthetic.census_bytes(), "application/json")
+        if self.path == BLS_PATH:
+            return self.send_body(200, self.listing(), "text/html")
+
+        path = os.path.join(self.directory, os.path.basename(self.path))
+        if not self.path.startswith(BLS_PATH) or not os.path.isfile(path):
+            return self.send_body(404, b"", "text/plain")
+
+        stat = os.stat(path)
+        etag = f'"{stat.st_size:x}-{stat.st_mtime_ns:x}"'
+        last_modified = email.utils.formatdate(stat.st_mtime, usegmt=True)
+
+        since = self.headers.get("If-Modified-Since")
+        if (self.headers.get("If-None-Match") == etag or
+            (since and email.utils.parsedate_to_datetime(since).timestamp() >= int(stat.st_mtime))):
+            self.count(304)
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        # Clients that do not accept gzip get the decoded bytes, which ranges then apply to
+        encoded = "gzip" in self.headers.get("Accept-Encoding", "")
+        size = stat.st_size if encoded else len(self.decoded(path))
+
+        # Ranges are honoured only while If-Range still matches
+        start, end = 0, size - 1
+        requested = self.headers.get("Range", "")
+        if requested.startswith("bytes=") and self.headers.get("If-Range") in (None, etag, last_modified):
+            first, _, last = requested[6:].partition("-")
+            start = int(first or 0)
+            end = min(int(last), size - 1) if last else end
+
+            # A range starting past the end, e.g. after the file shrank, cannot be served
+            if start >= size:
+                self.count(416)
+                self.send_response(416)
+                self.send_header("Content-Range", f"bytes */{size}")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+        partial = start > 0 or end < size - 1
+
+        self.count(206 if partial else 200)
+        self.send_response(206 if partial else 200)
+        self.send_header("Content-Type", "text/plain")
+        if encoded:
+            self.send_header("Content-Encoding", "gzip")
+        self.send_header("Content-Length", str(end + 1 - start))
+        if partial:
+            self.send_header("Content-Range", f"bytes {start}-{end}/{size}")
+        self.send_header("Accept-Ranges", "bytes")
+        self.send_header("ETag", etag)
+        self.send_header("Last-Modified", last_modified)
+        self.end_headers()
+        try:
+            if not encoded:
+                self.wfile.write(self.decoded(path)[start:end + 1])
+                return
+            with open(path, "rb") as f:
+                f.seek(start)
+                remaining = end + 1 - start
+                while remaining:
+                    chunk = f.read(min(remaining, 1024 * 1024))
+                    self.wfile.write(chunk)
+                    remaining -= len(chunk)
+        except (BrokenPipeError, ConnectionResetError):
+            # A sync that pauses mid-file drops the connection
+            pass
+
+    def decoded(self, path: str) -> bytes:
+        with open(path, "rb") as f:
+            return gzip.decompress(f.read())
+
+    def listing(self) -> bytes:
+        """IIS style index like the one download.bls.gov serves"""
+        rows = []
+        for name in sorted(os.listdir(self.directory)):
+            if name.endswith(".tmp"):
+                continue
+            stat = os.stat(os.path.join(self.directory, name))
+            stamp = datetime.fromtimestamp(stat.st_mtime).strftime("%m/%d/%Y %I:%M %p")
+            rows.append(f'{stamp} {stat.st_size:>12} <A HREF="{BLS_PATH}{name}">{name}</A><br>')
+        return f"<html><body><pre>{chr(10).join(rows)}</pre></body></html>".encode()
+
+    def send_body(self, status: int, body: bytes, content_type: str) -> None:
+        self.count(status)
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def count(self, status: int) -> None:
+        kind = "census" if self.path.startswith("/census") else "listing" if self.path == BLS_PATH else "file"
+        with self.lock:
+            self.requests[f"{kind}_{status}"] += 1
+
+    def log_message(self, *args):
+        pass
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def run_phase(phase: str, env: dict) -> dict:
+    """Run one phase in a fresh interpreter and return its measurements"""
+    out = subprocess.run(
+        [sys.executable, __file__, "--phase", phase],
+        env=env, capture_output=True, text=True
+    )
+    if out.returncode != 0:
+        raise RuntimeError(f"{phase} failed:\n{out.stderr}")
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+def phase_main(phase: str) -> None:
+    """Child process: invoke one handler and print a JSON result line"""
+    sys.path.insert(0, SRC)
+    if phase.startswith("client"):
+        from functions import client_rearc_lambda as module
+    else:
+        from analytics import analytics_rearc_lambda as module
+
+    # Count every S3 API call made through the Lambda's shared client
+    s3_calls = Counter()
+    module.get_s3().meta.events.register("before-call.s3", lambda model, **kw: s3_calls.update([model.name]))
+
+    start = time.perf_counter()
+    response = module.handler({}, None)
+    wall = time.perf_counter() - start
+
+    body = json.loads(response["body"])
+    print(json.dumps({
+        "status": response["statusCode"],
+        "wall_s": wall,
+        "peak_rss_mb": peak_rss_mb(),
+        "s3_calls": dict(s3_calls),
+        "metrics": body.get("metrics", {}),
+    }))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--series", type=int, nargs="+", default=[1000, 10000],
+                        help="series per data file, each ~155 rows, ~8 KB raw and ~1.4 KB gzipped")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 8])
+    parser.add_argument("--data-dir", default=os.path.join(tempfile.gettempdir(), "rearc-bench"))
+    parser.add_argument("--census-latency", type=float, default=0.0,
+                        help="seconds the census API takes to answer, datausa.io is often slow")
+    parser.add_argument("--s3-endpoint", help="use an existing S3 compatible endpoint instead of moto")
+    parser.add_argument("--json", action="store_true", help="print raw results as JSON lines")
+    parser.add_argument("--delta", action="store_true",
+                        help="sync pr.data by block delta and edit it between client runs, checking every rebuild")
+    parser.add_argument("--phase", choices=PHASES + DELTA_PHASES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.phase:
+        return phase_main(args.phase)
+
+    import boto3
+
+    endpoint = args.s3_endpoint
+    if not endpoint:
+        import logging
+        from moto.server import ThreadedMotoServer
+        logging.getLogger("werkzeug").setLevel(logging.ERROR)
+        port = free_port()
+        ThreadedMotoServer(ip_address="127.0.0.1", port=port, verbose=False).start()
+        endpoint = f"http://127.0.0.1:{port}"
+
+    SourceHandler.census_latency = args.census_latency
+    source = ThreadingHTTPServer(("127.0.0.1", 0), SourceHandler)
+    threading.Thread(target=source.serve_forever, daemon=True).start()
+    source_url = f"http://127.0.0.1:{source.server_address[1]}"
+
+    base_env = dict(
+        os.environ,
+        AWS_ENDPOINT_URL=endpoint,
+        AWS_ACCESS_KEY_ID=os.environ.get("AWS_ACCESS_KEY_ID", "bench"),
+        AWS_SECRET_ACCESS_KEY=os.environ.get("AWS_SECRET_ACCESS_KEY", "bench"),
+        AWS_DEFAULT_REGION=os.environ.get("AWS_DEFAULT_REGION", "us-east-1"),
+        s3_bls_key="bls/pr",
+        s3_census_key="census/",
+        bls_url=f"{source_url}{BLS_PATH}",
+        census_url=f"{source_url}/census",
+        user_agent="rearc-benchmark",
+        metrics_sink="text",
+    )
+    s3 = boto3.client("s3", endpoint_url=endpoint, region_name=base_env["AWS_DEFAULT_REGION"],
+                      aws_access_key_id=base_env["AWS_ACCESS_KEY_ID"],
+                      aws_secret_access_key=base_env["AWS_SECRET_ACCESS_KEY"])
+
+    if not args.json:
+        print(f"{'series':>7} {'workers':>7} {'phase':<15} {'wall s':>8} {'rss MB':>7} "
+              f"{'http':>5} {'s3':>5} {'MB/s':>7} {'rows/s':>10}{' sync' if args.delta else ''}")
+
+    if args.delta:
+        base_env.update(bls_delta_files='["pr.data.*"]', upload_part_size=str(DELTA_BLOCK))
+
+    for series in args.series:
+        SourceHandler.directory = build_dataset(args.data_dir, series)
+
+        for workers in args.workers:
+            bucket = f"bench-{series}-{workers}-{int(time.time())}"
+            s3.create_bucket(Bucket=bucket)
+            env = dict(base_env, s3_bucket=bucket, max_workers=str(workers), upload_concurrency=str(max(1, workers // 2)))
+
+            # Edits go to a scratch copy, the generated dataset is reused by later runs
+            if args.delta:
+                scratch = tempfile.mkdtemp(dir=args.data_dir)
+                SourceHandler.directory = shutil.copytree(build_dataset(args.data_dir, series), os.path.join(scratch, "pr"))
+                data_file = os.path.join(SourceHandler.directory, "pr.data.0.Current")
+
+            for phase in DELTA_PHASES if args.delta else PHASES:
+                if phase in DELTA_EDITS:
+                    manifest = json.loads(s3.get_object(Bucket=bucket, Key="bls/pr/_manifest.json")["Body"].read())
+                    with open(data_file, "rb") as f:
+                        raw = DELTA_EDITS[phase](gzip.decompress(f.read()), manifest["files"]["pr.data.0.Current"])
+                    with open(data_file, "wb") as f:
+                        f.write(gzip.compress(raw, compresslevel=1))
+
+                before = Counter(SourceHandler.requests)
+                result = run_phase(phase, env)
+                http = Counter(SourceHandler.requests)
+                http.subtract(before)
+
+                metrics = result["metrics"]
+                transferred = metrics.get("download_bytes", 0) + metrics.get("csv_parse_bytes", 0)
+                rows = metrics.get("csv_parse_rows", metrics.get("parquet_read_rows", 0))
+                result.update(series=series, workers=workers, phase=phase, http={k: v for k, v in http.items() if v})
+
+                if args.delta:
+                    with open(data_file, "rb") as f:
+                        source = gzip.decompress(f.read())
+                    stored = s3.get_object(Bucket=bucket, Key="bls/pr/pr.data.0.Current")["Body"].read()
+                    if stored != source:
+                        raise SystemExit(f"{phase}: stored pr.data.0.Current ({len(stored)} bytes) differs from "
+                                         f"the source ({len(source)} bytes)")
+                    result["sync"] = "delta" if metrics.get("delta") else "full" if metrics.get("uploaded") else "none"
+
+                if args.json:
+                    print(json.dumps(result))
+                    continue
+
+                print(f"{series:>7} {workers:>7} {phase:<15} {result['wall_s']:>8.2f} {result['peak_rss_mb']:>7.0f} "
+                      f"{sum(http.values()):>5} {sum(result['s3_calls'].values()):>5} "
+                      f"{transferred / 1e6 / result['wall_s']:>7.1f} {rows / result['wall_s']:>10.0f}"
+                      f"{' ' + result['sync'] if args.delta else ''}")
+
+            if args.delta:
+                shutil.rmtree(scratch)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""
+Cost of writing every report table compared with the single merged output.
+
+Both variants start from the same typed BLS frame. "single" builds and
+serializes only the merged census/BLS table, which is what the Lambda used
+to persist. "multi" builds the merged table, census_stats and bls_best_years
+in one pass and serializes all three to Parquet.
+
+    python benchmarks/report_outputs.py --series 100 1000 5000
+"""
+import argparse, io, os, sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+sys.path.insert(0, os.path.dirname(__file__))
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import synthetic
+from measure import timed
+from analytics import analytics_rearc_lambda as analytics
+
+def to_parquet(df: pd.DataFrame) -> int:
+    buffer = io.BytesIO()
+    pq.write_table(pa.Table.from_pandas(df, preserve_index=False), buffer, compression="zstd")
+    return buffer.tell()
+
+def single(bls_data: pd.DataFrame, census_data: pd.DataFrame) -> int:
+    lookup = analytics.lookup_bls(bls_data)
+    merged = pd.merge(census_data, lookup, on="year", how="inner")
+    return to_parquet(merged)
+
+def multi(bls_data: pd.DataFrame, census_data: pd.DataFrame) -> int:
+    tables = analytics.generate_report(bls_data, census_data)
+    return sum(to_parquet(df) for df in tables.values())
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--series", type=int, nargs="+", default=[100, 1000, 5000])
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    census = pd.DataFrame(synthetic.census_payload()["data"])
+    census.columns = census.columns.str.strip().str.lower().str.replace(" ", "_")
+
+    print(f"{'rows':>10} {'single ms':>10} {'multi ms':>10} {'ratio':>6}")
+    for series in args.series:
+        bls_data = analytics.to_bls_frame(analytics.parse_bls_arrow(io.BytesIO(synthetic.bls_bytes(series))))
+
+        # The old path still had to group the whole frame before it could merge
+        single_ms = timed(lambda: (analytics.aggregate_bls(bls_data), single(bls_data, census)), runs=args.runs)
+        multi_ms = timed(multi, bls_data, census, runs=args.runs)
+        print(f"{len(bls_data):>10} {single_ms:>10.1f} {multi_ms:>10.1f} {multi_ms / single_ms:>6.2f}")
+
+if __name__ == "__main__":
+    main()
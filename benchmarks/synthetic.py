@@ -0,0 +1,72 @@
+"""
+Synthetic data shaped like the BLS `pr` survey and the datausa census API.
+
+Files are generated as a stream so multi-GB `pr.data.*` files can be written
+without holding them in memory.
+"""
+import gzip, io, json, random
+from typing import BinaryIO, Iterator
+
+HEADER  = "series_id                     \tyear\tperiod\t       value\tfootnote_codes"
+PERIODS = ["Q01", "Q02", "Q03", "Q04", "Q05"]
+
+def series_ids(count: int) -> list:
+    """BLS-style series ids, always including PRS30006032 used by the report"""
+    ids = {f"PRS{30000000 + i * 7:08d}" for i in range(count)}
+    ids.add("PRS30006032")
+    return sorted(ids)
+
+def bls_lines(series: int, first_year: int = 1995, last_year: int = 2025, seed: int = 1) -> Iterator[str]:
+    """Tab-separated, whitespace padded rows in the layout of pr.data.0.Current"""
+    rng = random.Random(seed)
+    yield HEADER
+
+    for series_id in series_ids(series):
+        for year in range(first_year, last_year + 1):
+            for period in PERIODS:
+                footnote = "R" if rng.random() < 0.05 else ""
+                yield f"{series_id:<30}\t{year}\t{period}\t{rng.uniform(-50, 150):12.3f}\t{footnote}"
+
+def write_bls(out: BinaryIO, series: int, compress: bool = True, **kwargs) -> None:
+    """Stream a synthetic BLS data file, gzipped like the objects ingestion stores"""
+    target = gzip.GzipFile(fileobj=out, mode="wb", compresslevel=1) if compress else out
+
+    buffer = []
+    for line in bls_lines(series, **kwargs):
+        buffer.append(line)
+        if len(buffer) >= 10000:
+            target.write(("\n".join(buffer) + "\n").encode())
+            buffer = []
+    target.write(("\n".join(buffer) + "\n").encode() if buffer else b"")
+
+    if compress:
+        target.close()
+
+def bls_bytes(series: int, **kwargs) -> bytes:
+    """A whole synthetic BLS data file in memory, for small benchmark sizes"""
+    out = io.BytesIO()
+    write_bls(out, series, **kwargs)
+    return out.getvalue()
+
+def rows_for(series: int, first_year: int = 1995, last_year: int = 2025) -> int:
+    """Number of data rows a synthetic file with `series` series contains"""
+    return len(series_ids(series)) * (last_year - first_year + 1) * len(PERIODS)
+
+def census_payload(first_year: int = 2013, last_year: int = 2023) -> dict:
+    """Payload in the shape of the datausa population API"""
+    return {
+        "data": [
+            {
+                "ID Nation": "01000US",
+                "Nation": "United States",
+                "ID Year": year,
+                "Year": year,
+                "Population": 310000000 + (year - 2010) * 2100000,
+                "Slug Nation": "united-states"
+            }
+            for year in range(last_year, first_year - 1, -1)
+        ]
+    }
+
+def census_bytes(**kwargs) -> bytes:
+    return json.dumps(census_payload(**kwargs)).encode("utf-8")
@@ -1,39 +1,129 @@
-import io, json, boto3, logging, os
-import pandas as pd
-import pyarrow as pa
-import pyarrow.parquet as pq
+from __future__ import annotations
+
+import io, json, logging, os, shutil, tempfile, uuid
 from datetime import datetime, timezone
-from typing import Dict, Any
+from typing import Dict, Any, Iterator, Tuple, List, Optional
+from urllib.parse import unquote_plus
 from botocore.config import Config
 from botocore.exceptions import ClientError, ReadTimeoutError, ConnectTimeoutError
+from common.transfer import upload_buffer, upload_stream
+from common.startup import lazy_import, get_client
+from common.metrics import metrics
+from common.reconcile import iter_objects, delete_keys
+from common.keys import bls_cache_key, bls_manifest_key, census_parquet_key, census_pointer_key
+
+# Heavy libraries load on first use so a batch whose reports already exist never imports them
+np    = lazy_import("numpy")
+pd    = lazy_import("pandas")
+pa    = lazy_import("pyarrow")
+pc    = lazy_import("pyarrow.compute")
+pacsv = lazy_import("pyarrow.csv")
+pq    = lazy_import("pyarrow.parquet")
+pads  = lazy_import("pyarrow.dataset")
+pafs  = lazy_import("pyarrow.fs")
+
+# Optional, only needed by analytics_backend=duckdb
+duckdb = lazy_import("duckdb")
 
 # CONFIG
-UTC_DATE      = datetime.now(timezone.utc).date().isoformat()
 S3_BUCKET     = os.environ.get("s3_bucket")
 S3_BLS        = os.environ.get("s3_bls_key")
 S3_CENSUS_KEY = os.environ.get("s3_census_key")
-S3_CENSUS     = f"{S3_CENSUS_KEY}{UTC_DATE}/census.json"
-S3_MERGED     = f"analytics/{UTC_DATE}/bls_census_stats.parquet"
+BLS_FILE      = "pr.data.0.Current"
+BLS_LOADER    = os.environ.get("bls_loader", "arrow")
+BLS_REPORT    = os.environ.get("bls_report_mode", "memory")
+BLS_BLOCK     = int(os.environ.get("bls_block_size", str(16 * 1024 * 1024)))
+BLS_CACHE     = os.environ.get("bls_cache", "true").lower() == "true"
+S3_STATE      = "analytics/_state"
+S3_ANALYTICS  = os.environ.get("s3_analytics_key", "analytics")
+ROW_GROUP     = int(os.environ.get("analytics_row_group_rows", "131072"))
+BACKEND       = os.environ.get("analytics_backend", "pandas")
+DUCKDB_THREADS = int(os.environ.get("duckdb_threads", str(os.cpu_count() or 1)))
+DUCKDB_MEMORY  = os.environ.get("duckdb_memory_limit",
+                                f"{int(os.environ.get('AWS_LAMBDA_FUNCTION_MEMORY_SIZE', '2048')) // 2}MB")
+
+# BLS rows joined with census per year, a JSON list of {"series_id", "year", "period"}
+# where year may be a [start, end] range and a missing year or period matches any
+BLS_LOOKUPS   = os.environ.get("bls_lookups", '[{"series_id": "PRS30006032", "year": 2018, "period": "Q01"}]')
+
+# Layout of the BLS time.series data files, the header row is padded with
+# whitespace so the names are supplied here instead of being parsed
+BLS_FIELDS  = ["series_id", "year", "period", "value", "footnote_codes"]
+BLS_COLUMNS = ["series_id", "year", "period", "value"]
+GROUP_COLUMNS = ["series_id", "year", "total_value"]
+
+# Files are stored gzip-encoded as served, except delta-synced ones which are plain text
+GZIP_MAGIC = b"\x1f\x8b"
+
+# Report tables written per run and whether each one is also partitioned by year
+REPORT_TABLES = {
+    "bls_census_stats": True,
+    "census_stats": False,
+    "bls_best_years": False,
+}
 
 s3_config = Config(connect_timeout=5, read_timeout=15, retries={"max_attempts": 3})
-s3 = boto3.client("s3", config=s3_config)
+
+# ETag of the raw BLS file behind each local Parquet copy, kept for warm invocations
+_local_etags: Dict[str, str] = {}
 
 # Initiate logger
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
+def get_s3():
+    """S3 client shared by every invocation in this container"""
+    return get_client("s3", s3_config)
+
+def utc_date() -> str:
+    """Today's UTC date, evaluated per invocation so warm containers roll over at midnight"""
+    return datetime.now(timezone.utc).date().isoformat()
+
+def census_key(run_date: Optional[str] = None) -> str:
+    """Census object key for a run date, today by default"""
+    return f"{S3_CENSUS_KEY}{run_date or utc_date()}/census.json"
+
+def latest_census_key() -> str:
+    """
+    Newest census object, which is not today's when ingestion skipped an
+    unchanged series. Falls back to today's key before the first pointer.
+    """
+    try:
+        response = get_s3().get_object(Bucket=S3_BUCKET, Key=census_pointer_key(S3_CENSUS_KEY))
+        return json.loads(response["Body"].read())["key"]
+    except ClientError as e:
+        if e.response["Error"]["Code"] != "NoSuchKey":
+            raise
+    return census_key()
+
+def bls_schema() -> Dict[str, Any]:
+    """Arrow types of the BLS data file columns"""
+    return {
+        "series_id": pa.dictionary(pa.int32(), pa.string()),
+        "year": pa.int16(),
+        "period": pa.dictionary(pa.int32(), pa.string()),
+        "value": pa.float32(),
+        "footnote_codes": pa.dictionary(pa.int32(), pa.string()),
+    }
+
 def handler(event, context) -> Dict[str, Any]:
+    metrics.reset("analytics")
+
+    # SQS deliveries carry S3 notifications, anything else is a manual run for the latest census
+    records = (event or {}).get("Records") or []
+    if records and records[0].get("eventSource") == "aws:sqs":
+        res = handle_batch(records)
+        metrics.flush()
+        return res
 
     try:
-        bls_data = read_bls("pr.data.0.Current")
-        census_data = read_census()
-        res = generate_report(bls_data, census_data)
-        upload_parquet_to_s3(res)
+        res = generate_census_report(latest_census_key(), load_bls_aggregates())
         return {
             "statusCode": 200,
             "body": json.dumps({
                 "message": "Report generated successfully",
-                "numRows": f"Number of rows of data: {len(res)}"
+                "numRows": f"Number of rows of data: {len(res['bls_census_stats'])}",
+                "metrics": metrics.flush()
             })
         }
 
@@ -43,7 +133,8 @@ def handler(event, context) -> Dict[str, Any]:
             "statusCode": 504,
             "body": json.dumps({
                 "message": "S3 timeout error",
-                "error": str(timeoutErr)
+                "error": str(timeoutErr),
+                "metrics": metrics.flush()
             })
         }
 
@@ -54,25 +145,165 @@ def handler(event, context) -> Dict[str, Any]:
             "statusCode": 500,
             "body": json.dumps({
                 "message": "Handler failed",
-                "error": str(err)
+                "error": str(err),
+                "metrics": metrics.flush()
             })
         }
 
-def read_bls(file_name: str) -> pd.DataFrame:
+def handle_batch(records: List[dict]) -> Dict[str, Any]:
+    """Run one report per distinct census object in an SQS batch"""
+    failures = set()
+    objects: Dict[str, dict] = {}
+
+    # Coalesce notifications, keeping the newest version of every census key
+    for record in records:
+        try:
+            for notice in parse_s3_notification(record["body"]):
+                current = objects.get(notice["key"])
+                if current is None or notice["sequencer"] > current["sequencer"]:
+                    notice["message_ids"] = current["message_ids"] if current else set()
+                    objects[notice["key"]] = current = notice
+                current["message_ids"].add(record["messageId"])
+
+        except (ValueError, KeyError, TypeError) as e:
+            logger.error(f"Unreadable SQS message {record.get('messageId')}: {e}")
+            failures.add(record.get("messageId"))
+
+    bls = None
+    for census_key, notice in objects.items():
+        try:
+            if report_exists(census_key, notice["version"]):
+                logger.info(f"Report for {census_key} ({notice['version']}) already exists")
+                metrics.count("reports_skipped")
+                continue
+
+            # BLS is loaded at most once per batch and shared by every report
+            if bls is None:
+                bls = load_bls_aggregates()
+
+            generate_census_report(census_key, bls, notice["version"])
+            metrics.count("reports")
+
+        except Exception as err:
+            logger.error(f"Report failed for {census_key}: {err}")
+            metrics.count("report_failures")
+            failures.update(notice["message_ids"])
+
+    return {
+        "batchItemFailures": [{"itemIdentifier": message_id} for message_id in sorted(failures) if message_id]
+    }
+
+def parse_s3_notification(body: str) -> List[dict]:
+    """Extract census object key, version and sequencer from an S3 event message"""
+    notices = []
+
+    for record in json.loads(body).get("Records", []):
+        if not record.get("eventName", "").startswith("ObjectCreated"):
+            continue
+
+        obj = record["s3"]["object"]
+        notices.append({
+            "key": unquote_plus(obj["key"]),
+            "version": obj.get("versionId") or obj.get("eTag") or "",
+            # Sequencers are hex strings that only compare correctly at equal length
+            "sequencer": obj.get("sequencer", "").rjust(32, "0")
+        })
+
+    # s3:TestEvent and other non-create messages yield nothing and succeed
+    return notices
+
+def run_date_of(census_key: str) -> str:
+    """Run date of a census object, e.g. census/<date>/census.json"""
+    return census_key[len(S3_CENSUS_KEY):].split("/")[0]
+
+def report_prefix(name: str, run_date: str) -> str:
+    """Partition directory holding one report table of a run"""
+    return f"{S3_ANALYTICS}/{name}/run_date={run_date}"
+
+def run_marker(run_date: str) -> str:
+    """Object written once every report table of a run is in place"""
+    return f"{S3_ANALYTICS}/_runs/{run_date}.json"
+
+def report_exists(census_key: str, version: str) -> bool:
+    """Whether the report for this exact census object version has been written"""
+    try:
+        obj = get_s3().head_object(Bucket=S3_BUCKET, Key=run_marker(run_date_of(census_key)))
+    except ClientError as e:
+        if e.response["Error"]["Code"] in ("404", "NoSuchKey"):
+            return False
+        raise
+
+    metadata = obj.get("Metadata", {})
+    return metadata.get("census-key") == census_key and metadata.get("census-version") == version
+
+def load_bls_aggregates() -> Tuple[Optional[pd.DataFrame], pd.DataFrame, Optional[pd.DataFrame]]:
+    """BLS totals, lookup rows and best years used by every census report, either totals or best years may be None"""
+
+    # Incremental mode only re-reads the blocks changed since the last run
+    if BLS_REPORT == "incremental":
+        return incremental_aggregate_bls(BLS_FILE)
+
+    # Streaming mode never holds the full BLS file, only per-group totals
+    if BLS_REPORT == "stream":
+        return (*stream_aggregate_bls(BLS_FILE), None)
+
+    # DuckDB scans a local copy of the Parquet cache and can spill to /tmp
+    if BACKEND == "duckdb":
+        return (*duckdb_aggregate_bls(local_bls_parquet(BLS_FILE)), None)
+    if BACKEND == "arrow":
+        return (*arrow_aggregate_bls(read_bls_table(BLS_FILE)), None)
+    return (*aggregate_bls(read_bls(BLS_FILE)), None)
+
+def generate_census_report(census_key: str, bls: Tuple[Optional[pd.DataFrame], pd.DataFrame, Optional[pd.DataFrame]],
+                           version: Optional[str] = None) -> Dict[str, pd.DataFrame]:
+    """Build and upload every report table for one census object"""
+    census_data = read_census(census_key)
+    bls_grouped, bls_lookup, bls_best_years = bls
+    res = build_report(bls_grouped, bls_lookup, census_data, bls_best_years)
+
+    run_date = run_date_of(census_key)
+    files = {
+        name: upload_parquet_dataset(res[name], name, run_date, by_year)
+        for name, by_year in REPORT_TABLES.items()
+    }
+
+    metadata = {"census-key": census_key}
+    if version:
+        metadata["census-version"] = version
+
+    # The run marker is written last so a partial run is never seen as complete
+    get_s3().put_object(
+        Bucket=S3_BUCKET,
+        Key=run_marker(run_date),
+        Body=json.dumps({"census_key": census_key, "files": files}).encode("utf-8"),
+        ContentType="application/json",
+        Metadata=metadata
+    )
+    return res
+
+def read_bls(file_name: str, columns: list = BLS_COLUMNS) -> pd.DataFrame:
     """Load and return BLS data"""
     s3_key = f"{S3_BLS}/{file_name}"
 
     try:
-        response = s3.get_object(
-            Bucket=S3_BUCKET,
-            Key=s3_key
-        )
+        if BLS_LOADER == "arrow":
+            return to_bls_frame(read_bls_table(file_name, columns))
 
-        bls_df = pd.read_csv(
-            io.BytesIO(response["Body"].read()),
-            compression="gzip",
-            sep="\t"
-        )
+        with metrics.timer("download"):
+            response = get_s3().get_object(
+                Bucket=S3_BUCKET,
+                Key=s3_key
+            )
+            body = response["Body"].read()
+        metrics.add_bytes("download", len(body))
+
+        with metrics.timer("csv_parse"):
+            bls_df = pd.read_csv(
+                io.BytesIO(body),
+                compression="gzip" if body[:2] == GZIP_MAGIC else None,
+                sep="\t"
+            )
+        metrics.add_rows("csv_parse", len(bls_df))
 
         bls_df.columns = (
             bls_df.columns
@@ -80,7 +311,10 @@ def read_bls(file_name: str) -> pd.DataFrame:
             .str.lower()
             .str.replace(" ", "_")
         )
-        return bls_df
+
+        for col in ["series_id", "period"]:
+            bls_df[col] = bls_df[col].str.strip()
+        return bls_df[columns]
 
     except ClientError as e:
         logger.error(f"BLS path: {s3_key}")
@@ -89,17 +323,147 @@ def read_bls(file_name: str) -> pd.DataFrame:
 
     return pd.DataFrame()
 
-def read_census() -> pd.DataFrame:
-    """Load and return census data frame"""
+def read_bls_table(file_name: str, columns: list = BLS_COLUMNS) -> pa.Table:
+    """Typed BLS table, served from the Parquet cache while the raw file's ETag matches"""
+    s3_key = f"{S3_BLS}/{file_name}"
+    cache_key = bls_cache_key(S3_BLS, file_name)
+
+    if not BLS_CACHE:
+        response = get_s3().get_object(Bucket=S3_BUCKET, Key=s3_key)
+        metrics.add_bytes("csv_parse", response["ContentLength"])
+        return parse_bls_arrow(response["Body"], columns)
+
+    etag = get_s3().head_object(Bucket=S3_BUCKET, Key=s3_key)["ETag"]
+
     try:
-        response = s3.get_object(
-            Bucket=S3_BUCKET,
-            Key=S3_CENSUS
+        cached = get_s3().get_object(Bucket=S3_BUCKET, Key=cache_key)
+
+        if cached["Metadata"].get("source-etag") == etag:
+            logger.info(f"BLS cache hit for {file_name}")
+            metrics.count("bls_cache_hits")
+
+            with metrics.timer("download"):
+                body = cached["Body"].read()
+            metrics.add_bytes("download", len(body))
+
+            with metrics.timer("parquet_read"):
+                table = pq.read_table(pa.BufferReader(body), columns=columns)
+            metrics.add_rows("parquet_read", len(table))
+            return table
+
+        cached["Body"].close()
+        logger.info(f"BLS cache for {file_name} is stale")
+
+    except ClientError as e:
+        if e.response["Error"]["Code"] != "NoSuchKey":
+            raise
+        logger.info(f"No BLS cache for {file_name}")
+
+    # Parse every column once so the cache can serve any later projection
+    response = get_s3().get_object(Bucket=S3_BUCKET, Key=s3_key, IfMatch=etag)
+    metrics.add_bytes("csv_parse", response["ContentLength"])
+    table = parse_bls_arrow(response["Body"], BLS_FIELDS)
+
+    buffer = io.BytesIO()
+    with metrics.timer("parquet_write"):
+        pq.write_table(table, buffer, compression="zstd")
+    metrics.add_rows("parquet_write", len(table))
+
+    upload_buffer(
+        get_s3(), buffer, S3_BUCKET, cache_key,
+        ContentType="application/x-parquet",
+        Metadata={"source-etag": etag}
+    )
+    logger.info(f"BLS cache written to s3://{S3_BUCKET}/{cache_key}")
+
+    return table.select(columns)
+
+def parse_bls_arrow(body, columns: list = BLS_COLUMNS, header: bool = True) -> pa.Table:
+    """Parse a gzipped BLS file straight from the S3 stream into typed columns"""
+    schema = bls_schema()
+
+    # Download and parse overlap here, so both are charged to csv_parse
+    with metrics.timer("csv_parse"):
+        table = pacsv.read_csv(
+            open_bls(body),
+            read_options=pacsv.ReadOptions(column_names=BLS_FIELDS, skip_rows=int(header)),
+            parse_options=pacsv.ParseOptions(delimiter="\t"),
+            convert_options=pacsv.ConvertOptions(
+                include_columns=columns,
+                column_types={col: schema[col] for col in columns}
+            )
         )
+        table = trim_dictionaries(table)
+    metrics.add_rows("csv_parse", len(table))
+    return table
+
+def open_bls(body) -> pa.NativeFile:
+    """Arrow stream over a stored BLS file, decompressed when it starts with the gzip magic bytes"""
+    magic = body.read(2)
+    stream = pa.input_stream(Prefixed(magic, body))
+    return pa.CompressedInputStream(stream, "gzip") if magic == GZIP_MAGIC else stream
+
+class Prefixed(io.RawIOBase):
+    """Read-only stream replaying bytes already read from another stream before the rest of it"""
+
+    def __init__(self, prefix: bytes, rest):
+        self._prefix = prefix
+        self._rest = rest
+
+    def readable(self) -> bool:
+        return True
+
+    def read(self, size: int = -1) -> bytes:
+        # Arrow takes a short read for the end of the stream, so the replayed
+        # bytes are topped up from the rest in the same call
+        head, self._prefix = (self._prefix, b"") if size < 0 else (self._prefix[:size], self._prefix[size:])
+        if size < 0:
+            return head + self._rest.read()
+        return head + self._rest.read(size - len(head)) if size > len(head) else head
+
+def to_bls_frame(table: pa.Table) -> pd.DataFrame:
+    """Convert a typed BLS table to pandas with sorted categories"""
+    bls_df = table.to_pandas()
+    for col in bls_df.select_dtypes("category").columns:
+        bls_df[col] = bls_df[col].cat.reorder_categories(sorted(bls_df[col].cat.categories))
+    return bls_df
+
+def trim_dictionaries(table: pa.Table) -> pa.Table:
+    """Strip padding from dictionary columns by trimming only their distinct values"""
+    for i, field in enumerate(table.schema):
+        if not pa.types.is_dictionary(field.type):
+            continue
+
+        chunks = []
+        for chunk in table.column(i).chunks:
+            # Re-encode the trimmed values in case two padded spellings collapse
+            trimmed = pc.utf8_trim_whitespace(chunk.dictionary).dictionary_encode()
+            indices = pc.take(trimmed.indices, chunk.indices)
+            chunks.append(pa.DictionaryArray.from_arrays(indices, trimmed.dictionary))
+
+        table = table.set_column(i, field.name, pa.chunked_array(chunks, field.type))
+
+    return table.unify_dictionaries()
+
+def read_census(s3_key: Optional[str] = None) -> pd.DataFrame:
+    """Load and return census data frame, from its typed Parquet copy when there is one"""
+    s3_key = s3_key or census_key()
 
-        payload = json.loads(response["Body"].read())
-        census_data = payload["data"]
-        census_df = pd.DataFrame(census_data)
+    try:
+        census_df = read_census_parquet(s3_key)
+
+        if census_df is None:
+            with metrics.timer("download"):
+                response = get_s3().get_object(
+                    Bucket=S3_BUCKET,
+                    Key=s3_key
+                )
+                body = response["Body"].read()
+            metrics.add_bytes("download", len(body))
+
+            payload = json.loads(body)
+            census_data = payload["data"]
+            census_df = pd.DataFrame(census_data)
 
         census_df.columns = (
             census_df.columns
@@ -110,37 +474,594 @@ def read_census() -> pd.DataFrame:
         return census_df
 
     except ClientError as e:
-        logger.error(f"Census path: {S3_CENSUS}")
+        logger.error(f"Census path: {s3_key}")
         if e.response["Error"]["Code"] == "NoSuchKey":
             logger.error("Census data does not exists")
 
     return pd.DataFrame()
 
-def upload_parquet_to_s3(df: pd.DataFrame) -> None:
+def read_census_parquet(s3_key: str) -> Optional[pd.DataFrame]:
+    """Census Parquet copy written by ingestion, None when missing or not from this JSON object"""
+    parquet_key = census_parquet_key(s3_key)
+
+    try:
+        expected = get_s3().head_object(Bucket=S3_BUCKET, Key=s3_key)["Metadata"].get("sha256")
+        response = get_s3().get_object(Bucket=S3_BUCKET, Key=parquet_key)
+
+        if not expected or response["Metadata"].get("source-sha256") != expected:
+            response["Body"].close()
+            logger.info(f"{parquet_key} does not match {s3_key}, reading the JSON")
+            return None
+
+        with metrics.timer("download"):
+            body = response["Body"].read()
+        metrics.add_bytes("download", len(body))
+
+        with metrics.timer("parquet_read"):
+            census_df = pq.read_table(pa.BufferReader(body)).to_pandas()
+        metrics.add_rows("parquet_read", len(census_df))
+        return census_df
+
+    except ClientError as e:
+        if e.response["Error"]["Code"] not in ("NoSuchKey", "404"):
+            raise
+        logger.info(f"No census Parquet copy at {parquet_key}")
+
+    return None
+
+def upload_parquet_dataset(df: pd.DataFrame, name: str, run_date: Optional[str] = None,
+                           by_year: bool = True) -> List[str]:
+    """
+    Write a DataFrame to S3 as a Parquet dataset partitioned by run_date (and year).
+    """
+    run_date = run_date or utc_date()
+    prefix = report_prefix(name, run_date)
+
+    # Sorting keeps the row-group min/max statistics tight for predicate pushdown
+    df = df.sort_values([col for col in ["year", "series_id"] if col in df.columns])
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    if "year" in table.column_names:
+        table = table.set_column(table.schema.get_field_index("year"), "year", pc.cast(table["year"], pa.int64()))
+    table = table.append_column("run_date", pa.array([run_date] * len(table), pa.string()))
+
+    file_format = pads.ParquetFileFormat()
+    file_options = file_format.make_write_options(compression="zstd", use_dictionary=True, write_statistics=True)
+    written = []
+
+    with tempfile.TemporaryDirectory() as tmp:
+        with metrics.timer("parquet_write"):
+            pads.write_dataset(
+                table, tmp,
+                format=file_format,
+                file_options=file_options,
+                partitioning=analytics_partitioning(by_year),
+                basename_template=f"part-{uuid.uuid4().hex}-{{i}}.parquet",
+                max_rows_per_group=ROW_GROUP,
+                min_rows_per_group=ROW_GROUP // 2,
+                file_visitor=lambda f: written.append(f.path)
+            )
+        metrics.add_rows("parquet_write", len(table))
+
+        keys = []
+        for path in written:
+            s3_key = f"{S3_ANALYTICS}/{name}/{os.path.relpath(path, tmp)}"
+            with open(path, "rb") as f:
+                upload_stream(
+                    get_s3(), iter(lambda: f.read(1024 * 1024), b""), S3_BUCKET, s3_key,
+                    ContentType="application/x-parquet",
+                    ServerSideEncryption="AES256"
+                )
+            keys.append(s3_key)
+
+    # Files left over from an earlier run on the same date are replaced
+    stale = [
+        obj["Key"]
+        for obj in iter_objects(get_s3(), S3_BUCKET, prefix, recursive=True)
+        if obj["Key"] not in keys
+    ]
+    delete_keys(get_s3(), S3_BUCKET, stale, dry_run=False)
+
+    logger.info(f"{name} written as {len(keys)} files under s3://{S3_BUCKET}/{prefix}/")
+    return keys
+
+def analytics_partitioning(by_year: bool = True):
+    """Hive partitioning of the analytics datasets"""
+    fields = [("run_date", pa.string())] + ([("year", pa.int64())] if by_year else [])
+    return pads.partitioning(pa.schema(fields), flavor="hive")
+
+def read_analytics(name: str = "bls_census_stats", run_dates: Optional[List[str]] = None,
+                   years: Optional[List[int]] = None, columns: Optional[List[str]] = None,
+                   filter=None, filesystem=None) -> pd.DataFrame:
+    """
+    Read an analytics dataset. Partitions outside run_dates/years are pruned
+    before any file is opened and `filter` is pushed down to row-group statistics.
+    """
+    dataset = pads.dataset(
+        f"{S3_BUCKET}/{S3_ANALYTICS}/{name}",
+        filesystem=filesystem or pafs.S3FileSystem(),
+        format="parquet",
+        partitioning=analytics_partitioning(REPORT_TABLES.get(name, True))
+    )
+
+    expression = filter
+    for field, values in [("run_date", run_dates), ("year", years)]:
+        if values:
+            condition = pc.field(field).isin(values)
+            expression = condition if expression is None else expression & condition
+
+    return dataset.to_table(columns=columns, filter=expression).to_pandas()
+
+def generate_report(bls_data: pd.DataFrame, census_data: pd.DataFrame,
+                    lookups: Optional[List[dict]] = None) -> Dict[str, pd.DataFrame]:
+    """Generating report for census and bls"""
+    bls_grouped, bls_lookup = aggregate_bls(bls_data, lookups)
+    return build_report(bls_grouped, bls_lookup, census_data)
+
+def aggregate_bls(bls_data: pd.DataFrame, lookups: Optional[List[dict]] = None) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """Total value per series and year plus the lookup rows"""
+
+    # Generating total value of series per year for bls
+    with metrics.timer("groupby"):
+        bls_grouped = (bls_data
+                           .astype({"value": "float64"})
+                           .groupby(["series_id", "year"], as_index=False, observed=True)["value"]
+                           .sum()
+                           .rename(columns={"value": "total_value"})
+                       )
+    metrics.add_rows("groupby", len(bls_data))
+
+    return bls_grouped, lookup_bls(bls_data, lookups)
+
+def lookup_bls(bls_data: pd.DataFrame, lookups: Optional[List[dict]] = None) -> pd.DataFrame:
+    """Rows matching the configured lookups, answered from one index over the frame"""
+    lookups = json.loads(BLS_LOOKUPS) if lookups is None else lookups
+    return SeriesIndex(bls_data).lookup(lookups)
+
+class SeriesIndex:
+    """
+    BLS rows sorted by (series_id, year, period) packed into one int64 key, so
+    any point or year range lookup is two binary searches instead of a scan
+    """
+
+    def __init__(self, bls_data: pd.DataFrame):
+        self.data = bls_data
+        series_codes, self.series = self._encode(bls_data["series_id"])
+        period_codes, self.periods = self._encode(bls_data["period"])
+
+        with metrics.timer("index"):
+            keys = self.key(series_codes, bls_data["year"].to_numpy(np.int64), period_codes)
+            # BLS files are published in key order, which makes the sort a single pass
+            if np.all(keys[1:] >= keys[:-1]):
+                self.order, self.keys = np.arange(len(keys)), keys
+            else:
+                self.order = np.argsort(keys, kind="stable")
+                self.keys = keys[self.order]
+        metrics.add_rows("index", len(bls_data))
+
+    @staticmethod
+    def _encode(column: pd.Series) -> Tuple[np.ndarray, Dict[str, int]]:
+        """Integer codes of a column and the code of every value"""
+        if isinstance(column.dtype, pd.CategoricalDtype):
+            codes, values = column.cat.codes.to_numpy(np.int64), column.cat.categories
+        else:
+            codes, values = pd.factorize(column)
+            codes = codes.astype(np.int64)
+        return codes, {value: code for code, value in enumerate(values)}
+
+    @staticmethod
+    def key(series, year, period):
+        # Years and period codes both fit in 16 bits
+        return (series << 32) | (year << 16) | period
+
+    def bounds(self, query: dict) -> Optional[Tuple[int, int, Optional[int]]]:
+        """Lowest and highest key of a query, plus a period code still to filter on for year ranges"""
+        series = self.series.get(query["series_id"])
+        period = self.periods.get(query["period"], -1) if query.get("period") is not None else None
+        if series is None or period == -1:
+            return None
+
+        year = query.get("year")
+        if year is None:
+            return self.key(series, 0, 0), self.key(series + 1, 0, 0), period
+        start, end = (year, year) if isinstance(year, int) else year
+
+        # A single year and period is one exact key
+        if start == end and period is not None:
+            return self.key(series, start, period), self.key(series, start, period + 1), None
+        return self.key(series, start, 0), self.key(series, end + 1, 0), period
+
+    def lookup(self, queries: List[dict]) -> pd.DataFrame:
+        """Rows of every query in query order, searched as one batch"""
+        bounds = [b for b in map(self.bounds, queries) if b is not None]
+        if not bounds:
+            return self.data.iloc[:0][BLS_COLUMNS]
+
+        lows, highs, periods = zip(*bounds)
+        starts = np.searchsorted(self.keys, np.array(lows, dtype=np.int64), side="left")
+        ends = np.searchsorted(self.keys, np.array(highs, dtype=np.int64), side="left")
+
+        positions = []
+        for start, end, period in zip(starts, ends, periods):
+            hits = np.arange(start, end)
+            if period is not None:
+                hits = hits[(self.keys[hits] & 0xFFFF) == period]
+            positions.append(hits)
+
+        rows = pd.unique(self.order[np.concatenate(positions)])
+        return self.data.iloc[rows][BLS_COLUMNS]
+
+def arrow_aggregate_bls(table: pa.Table, lookups: Optional[List[dict]] = None) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """Same output as aggregate_bls, computed with multi-threaded Arrow kernels on the typed table"""
+    lookups = json.loads(BLS_LOOKUPS) if lookups is None else lookups
+
+    with metrics.timer("groupby"):
+        # Arrow hashes plain string keys faster than dictionary ones, and only those sort
+        values = pa.table({
+            "series_id": pc.cast(table["series_id"], pa.string()),
+            "year": table["year"],
+            "value": pc.cast(table["value"], pa.float64())
+        })
+        bls_grouped = (values
+                           .group_by(["series_id", "year"])
+                           .aggregate([("value", "sum")])
+                           .select(["series_id", "year", "value_sum"])
+                           .rename_columns(["series_id", "year", "total_value"])
+                           .sort_by([("series_id", "ascending"), ("year", "ascending")])
+                       )
+    metrics.add_rows("groupby", len(table))
+
+    expression = lookup_expression(lookups)
+    if expression is None:
+        bls_lookup = table.select(BLS_COLUMNS).slice(0, 0)
+    else:
+        bls_lookup = table.select(BLS_COLUMNS).filter(expression)
+
+    return bls_grouped.to_pandas(), to_bls_frame(bls_lookup)
+
+def lookup_expression(lookups: List[dict]):
+    """Arrow filter matching any of the lookups, None when there are none"""
+    expression = None
+
+    for query in lookups:
+        condition = pc.field("series_id") == query["series_id"]
+
+        year = query.get("year")
+        if year is not None:
+            start, end = (year, year) if isinstance(year, int) else year
+            condition &= (pc.field("year") >= start) & (pc.field("year") <= end)
+        if query.get("period") is not None:
+            condition &= pc.field("period") == query["period"]
+
+        expression = condition if expression is None else expression | condition
+
+    return expression
+
+def duckdb_aggregate_bls(path: str, lookups: Optional[List[dict]] = None) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Same output as aggregate_bls, computed by DuckDB straight from a Parquet
+    file. Row groups are streamed over every core and the aggregation spills
+    to local storage past the memory limit, so the file is never loaded whole.
+    """
+    lookups = json.loads(BLS_LOOKUPS) if lookups is None else lookups
+    source = "read_parquet('" + path.replace("'", "''") + "')"
+
+    con = duckdb.connect(config={
+        "threads": DUCKDB_THREADS,
+        "memory_limit": DUCKDB_MEMORY,
+        "temp_directory": os.path.join(tempfile.gettempdir(), "duckdb"),
+    })
+    try:
+        with metrics.timer("groupby"):
+            bls_grouped = con.execute(f"""
+                SELECT series_id, year, SUM(CAST(value AS DOUBLE)) AS total_value
+                FROM {source}
+                GROUP BY series_id, year
+                ORDER BY series_id, year
+            """).df()
+
+        conditions, params = [], []
+        for query in lookups:
+            year = query.get("year")
+            start, end = (year, year) if isinstance(year, int) or year is None else year
+            conditions.append("(series_id = ? AND year BETWEEN coalesce(?, year) AND coalesce(?, year)"
+                              " AND period = coalesce(?, period))")
+            params += [query["series_id"], start, end, query.get("period")]
+
+        bls_lookup = con.execute(f"""
+            SELECT {", ".join(BLS_COLUMNS)}
+            FROM {source}
+            WHERE {" OR ".join(conditions) or "false"}
+        """, params).df()
+
+    finally:
+        con.close()
+
+    return bls_grouped, bls_lookup
+
+def local_bls_parquet(file_name: str) -> str:
+    """Local copy of the BLS Parquet cache, downloaded again only when the raw file's ETag moves"""
+    s3_key = f"{S3_BLS}/{file_name}"
+    cache_key = bls_cache_key(S3_BLS, file_name)
+    path = os.path.join(tempfile.gettempdir(), f"{file_name}.parquet")
+
+    etag = get_s3().head_object(Bucket=S3_BUCKET, Key=s3_key)["ETag"]
+    if _local_etags.get(path) == etag and os.path.exists(path):
+        logger.info(f"Local BLS Parquet copy of {file_name} is current")
+        return path
+
+    cached = None
+    if BLS_CACHE:
+        try:
+            cached = get_s3().get_object(Bucket=S3_BUCKET, Key=cache_key)
+        except ClientError as e:
+            if e.response["Error"]["Code"] != "NoSuchKey":
+                raise
+
+    if cached is not None and cached["Metadata"].get("source-etag") == etag:
+        metrics.count("bls_cache_hits")
+        with metrics.timer("download"), open(path, "wb") as f:
+            shutil.copyfileobj(cached["Body"], f, 1024 * 1024)
+        metrics.add_bytes("download", cached["ContentLength"])
+
+    else:
+        if cached is not None:
+            cached["Body"].close()
+
+        # Parsing the raw file also refreshes the S3 cache
+        with metrics.timer("parquet_write"):
+            pq.write_table(read_bls_table(file_name, BLS_FIELDS), path, compression="zstd")
+
+    _local_etags[path] = etag
+    return path
+
+def stream_aggregate_bls(file_name: str, lookups: Optional[List[dict]] = None,
+                         block_size: int = BLS_BLOCK) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """Same output as aggregate_bls, reading the S3 object one record batch at a time"""
+    s3_key = f"{S3_BLS}/{file_name}"
+    response = get_s3().get_object(Bucket=S3_BUCKET, Key=s3_key)
+    metrics.add_bytes("csv_parse", response["ContentLength"])
+    schema = bls_schema()
+
+    reader = pacsv.open_csv(
+        open_bls(response["Body"]),
+        read_options=pacsv.ReadOptions(column_names=BLS_FIELDS, skip_rows=1, block_size=block_size),
+        parse_options=pacsv.ParseOptions(delimiter="\t"),
+        convert_options=pacsv.ConvertOptions(
+            include_columns=BLS_COLUMNS,
+            column_types={col: schema[col] for col in BLS_COLUMNS}
+        )
+    )
+
+    # Running totals keyed by (series_id, year), the only state kept across batches
+    totals = None
+    matches = []
+
+    for batch in metrics.timed("csv_parse", reader):
+        metrics.add_rows("csv_parse", batch.num_rows)
+        batch_df = trim_dictionaries(pa.Table.from_batches([batch])).to_pandas()
+        batch_df["series_id"] = batch_df["series_id"].astype(str)
+        batch_df["period"] = batch_df["period"].astype(str)
+
+        batch_grouped, batch_lookup = aggregate_bls(batch_df, lookups)
+        batch_totals = batch_grouped.set_index(["series_id", "year"])["total_value"]
+        totals = batch_totals if totals is None else totals.add(batch_totals, fill_value=0)
+        matches.append(batch_lookup)
+
+    if totals is None:
+        return pd.DataFrame(columns=["series_id", "year", "total_value"]), pd.DataFrame(columns=BLS_COLUMNS)
+
+    bls_grouped = totals.rename("total_value").reset_index()
+    bls_grouped["year"] = bls_grouped["year"].astype("int16")
+    bls_lookup = pd.concat(matches, ignore_index=True)
+
+    return bls_grouped, bls_lookup
+
+def incremental_aggregate_bls(file_name: str, lookups: Optional[List[dict]] = None) -> Tuple[Optional[pd.DataFrame], pd.DataFrame, Optional[pd.DataFrame]]:
     """
-    Serialize a DataFrame to Parquet and upload to S3.
+    Update the persisted best years from the blocks of the raw file that
+    changed, as recorded by ingestion for files synced by delta
+    (bls_delta_files). Totals are kept per block and only re-summed for the
+    series in a changed block, so they are not returned. Any other file is
+    aggregated in full.
     """
-    res_df = pa.Table.from_pandas(df)
+    lookups = json.loads(BLS_LOOKUPS) if lookups is None else lookups
+    obj = get_s3().head_object(Bucket=S3_BUCKET, Key=f"{S3_BLS}/{file_name}")
+    etag = obj["ETag"]
+
+    # Block hashes describe the stored object only while its size matches the manifest
+    synced = read_sync_manifest().get(file_name) or {}
+    if not synced.get("blocks") or synced.get("encoding") != "identity" or synced.get("size") != obj["ContentLength"]:
+        logger.info(f"No block hashes for {file_name}, aggregating it in full")
+        return (*aggregate_bls(read_bls(file_name), lookups), None)
+
+    blocks, block_size = synced["blocks"], synced["block_size"]
+    index = read_state_index()
+    state = [read_state(name)[0] for name in ("bls_best_years", "bls_lookup")]
+    usable = (index is not None and all(table is not None for table in state) and
+              index["block_size"] == block_size and index["lookups"] == lookups)
+
+    if usable and index["etag"] == etag:
+        logger.info(f"{file_name} unchanged since the last incremental run")
+        bls_best_years, bls_lookup = state
+        return None, bls_lookup.drop(columns="block"), bls_best_years[GROUP_COLUMNS]
+
+    # Rows are kept per block they start in, so the row running into the first
+    # changed block is re-read with the block before it
+    kept = 0
+    if usable:
+        while kept < min(len(blocks), len(index["blocks"])) and blocks[kept] == index["blocks"][kept]:
+            kept += 1
+    first = max(kept - 1, 0)
+    logger.info(f"Aggregating blocks {first}-{len(blocks) - 1} of {file_name}, {first} blocks unchanged")
+
+    # A crash from here on leaves no index, so the next run starts over
+    get_s3().delete_object(Bucket=S3_BUCKET, Key=f"{S3_STATE}/bls_blocks.json")
+
+    partials, matches = [], []
+    for block, data in read_block_segments(file_name, etag, first, len(blocks), block_size):
+        grouped, lookup = aggregate_bls(parse_bls_segment(data), lookups)
+        write_state(f"bls_blocks/{block:05d}", grouped, etag)
+        partials.append(grouped.assign(block=block))
+        matches.append(lookup.assign(block=block))
+
+    for block in range(len(blocks), len(index["blocks"]) if index else 0):
+        get_s3().delete_object(Bucket=S3_BUCKET, Key=f"{S3_STATE}/bls_blocks/{block:05d}.parquet")
+
+    changed = pd.concat(partials, ignore_index=True)
+    if first == 0:
+        kept_best_years, bls_lookup = None, pd.concat(matches, ignore_index=True)
+
+    else:
+        old_best_years, old_lookup = state
+
+        # Series with rows in a re-read block, before or after the change
+        series = pd.concat([changed["series_id"],
+                            old_best_years.loc[old_best_years["last_block"] >= first, "series_id"]]).unique()
+        stale = old_best_years["series_id"].isin(series)
+
+        # Their rows in unchanged blocks come from the stored block totals
+        spans = old_best_years.loc[stale & (old_best_years["first_block"] < first)]
+        unchanged = sorted({block for low, high in zip(spans["first_block"], spans["last_block"])
+                            for block in range(low, min(high, first - 1) + 1)})
+        for block in unchanged:
+            stored = read_state(f"bls_blocks/{block:05d}")[0]
+            partials.insert(0, stored.loc[stored["series_id"].isin(series)].assign(block=block))
+
+        logger.info(f"{len(series)} of {len(old_best_years)} series changed, {len(unchanged)} stored blocks read")
+        changed = pd.concat(partials, ignore_index=True)
+        kept_best_years = old_best_years.loc[~stale]
+        bls_lookup = pd.concat([old_lookup.loc[old_lookup["block"] < first], *matches], ignore_index=True)
+
+    # Best year of every re-summed series, with the blocks the series spans
+    totals = combine_blocks(changed)
+    spans = totals.groupby("series_id", as_index=False).agg(first_block=("first_block", "min"),
+                                                             last_block=("last_block", "max"))
+    bls_best_years = (pd.concat([kept_best_years, best_years(totals[GROUP_COLUMNS]).merge(spans, on="series_id")],
+                                ignore_index=True)
+                          .sort_values(["series_id", "year", "total_value"], ascending=[True, False, False])
+                          .reset_index(drop=True)
+                      )
+
+    write_state("bls_best_years", bls_best_years, etag)
+    write_state("bls_lookup", bls_lookup, etag)
+    write_state_index({"etag": etag, "blocks": blocks, "block_size": block_size, "lookups": lookups})
+
+    return None, bls_lookup.drop(columns="block"), bls_best_years[GROUP_COLUMNS]
+
+def combine_blocks(partials: pd.DataFrame) -> pd.DataFrame:
+    """Per-group totals from per-block totals, summed in block order, with the blocks each group spans"""
+    return (partials
+                .sort_values("block", kind="stable")
+                .groupby(["series_id", "year"], as_index=False)
+                .agg(total_value=("total_value", "sum"), first_block=("block", "min"), last_block=("block", "max"))
+            )
+
+def read_sync_manifest() -> Dict[str, dict]:
+    """Per-file entries of the manifest ingestion keeps next to the BLS files"""
+    try:
+        response = get_s3().get_object(Bucket=S3_BUCKET, Key=bls_manifest_key(S3_BLS))
+        return json.loads(response["Body"].read()).get("files", {})
 
-    # Write Parquet to buffer
+    except ClientError as e:
+        if e.response["Error"]["Code"] != "NoSuchKey":
+            raise
+
+    return {}
+
+def read_block_segments(file_name: str, etag: str, first: int, count: int,
+                        block_size: int) -> Iterator[Tuple[int, bytes]]:
+    """Rows of every block from `first` on, each block holding the rows that start in it"""
+
+    # One byte before the block tells whether a row starts right on its boundary
+    start = first * block_size - 1 if first else 0
+    extra = {"Range": f"bytes={start}-"} if start else {}
+    response = get_s3().get_object(Bucket=S3_BUCKET, Key=f"{S3_BLS}/{file_name}", IfMatch=etag, **extra)
+
+    with metrics.timer("download"):
+        body = response["Body"].read()
+    metrics.add_bytes("download", len(body))
+
+    def row_start(block: int) -> int:
+        if block >= count:
+            return len(body)
+        offset = body.find(b"\n", max(block * block_size - 1 - start, 0))
+        return len(body) if offset < 0 else offset + 1
+
+    # Block 0 starts after the header row
+    cuts = [row_start(block) for block in range(first, count + 1)]
+    for block, (low, high) in enumerate(zip(cuts, cuts[1:]), start=first):
+        yield block, body[low:high]
+
+def parse_bls_segment(data: bytes) -> pd.DataFrame:
+    """BLS rows of a headerless slice of a plain data file"""
+    if data.strip():
+        table = parse_bls_arrow(io.BytesIO(data), header=False)
+        for name in ["series_id", "period"]:
+            table = table.set_column(table.schema.get_field_index(name), name, table[name].cast(pa.string()))
+        bls_df = table.to_pandas()
+    else:
+        bls_df = pd.DataFrame({col: pd.Series(dtype=dtype) for col, dtype in
+                               zip(BLS_COLUMNS, [str, "int16", str, "float32"])})
+    return bls_df.astype({"series_id": str, "period": str})
+
+def read_state(name: str) -> Tuple[Optional[pd.DataFrame], Optional[str]]:
+    """Load an incremental state table and the BLS ETag it was built from"""
+    try:
+        response = get_s3().get_object(Bucket=S3_BUCKET, Key=f"{S3_STATE}/{name}.parquet")
+        state = pq.read_table(pa.BufferReader(response["Body"].read())).to_pandas()
+        return state, response["Metadata"].get("source-etag")
+
+    except ClientError as e:
+        if e.response["Error"]["Code"] != "NoSuchKey":
+            raise
+
+    return None, None
+
+def write_state(name: str, df: pd.DataFrame, etag: str) -> None:
+    """Persist an incremental state table tagged with the BLS ETag"""
     buffer = io.BytesIO()
-    pq.write_table(res_df, buffer)
-    buffer.seek(0)
+    pq.write_table(pa.Table.from_pandas(df, preserve_index=False), buffer, compression="zstd")
 
-    # Upload to S3
-    s3.put_object(
-        Bucket=S3_BUCKET,
-        Key=S3_MERGED,
-        Body=buffer.getvalue(),
+    upload_buffer(
+        get_s3(), buffer, S3_BUCKET, f"{S3_STATE}/{name}.parquet",
         ContentType="application/x-parquet",
-        ServerSideEncryption="AES256"  # optional, keep if you want SSE-S3
+        Metadata={"source-etag": etag}
     )
 
-    logger.info(f"Merged DataFrame uploaded to s3://{S3_BUCKET}/{S3_MERGED}")
+def read_state_index() -> Optional[dict]:
+    """Block hashes, block size and lookups the incremental state was built from"""
+    try:
+        response = get_s3().get_object(Bucket=S3_BUCKET, Key=f"{S3_STATE}/bls_blocks.json")
+        return json.loads(response["Body"].read())
 
+    except ClientError as e:
+        if e.response["Error"]["Code"] != "NoSuchKey":
+            raise
 
-def generate_report(bls_data: pd.DataFrame, census_data: pd.DataFrame) -> pd.DataFrame:
-    """Generating report for census and bls"""
+    return None
+
+def write_state_index(index: dict) -> None:
+    """Written last, so the state tables it describes are all in place"""
+    get_s3().put_object(
+        Bucket=S3_BUCKET,
+        Key=f"{S3_STATE}/bls_blocks.json",
+        Body=json.dumps(index).encode("utf-8"),
+        ContentType="application/json"
+    )
+
+def best_years(bls_grouped: pd.DataFrame) -> pd.DataFrame:
+    """Year with the highest total value for every series"""
+    with metrics.timer("groupby"):
+        return (bls_grouped
+                    .loc[bls_grouped.groupby("series_id", observed=True)["total_value"]
+                    .idxmax()]
+                    .reset_index(drop=True)
+                    .sort_values(["series_id", "year", "total_value"], ascending=[True, False, False])
+                )
+
+def build_report(bls_grouped: Optional[pd.DataFrame], bls_lookup: pd.DataFrame, census_data: pd.DataFrame,
+                 bls_best_years: Optional[pd.DataFrame] = None) -> Dict[str, pd.DataFrame]:
+    """Every report table, built from one set of BLS aggregates"""
 
     # Generating mean and std for census data
     census_2013_2018 = census_data[
@@ -157,32 +1078,19 @@ def generate_report(bls_data: pd.DataFrame, census_data: pd.DataFrame) -> pd.Dat
     })
 
     # Generating max total value of series for bls
-    bls_grouped = (bls_data
-                       .groupby(["series_id", "year"], as_index=False)["value"]
-                       .sum()
-                       .rename(columns={"value": "total_value"})
-                   )
-
-    bls_best_years = (bls_grouped
-                          .loc[bls_grouped.groupby("series_id")["total_value"]
-                          .idxmax()]
-                          .reset_index(drop=True)
-                          .sort_values(["series_id", "year", "total_value"], ascending=[True, False, False])
-                      )
-
-    bls_6032_q1 = bls_data.loc[
-                    (bls_data["series_id"].str.strip() == "PRS30006032") &
-                    (bls_data["year"] == 2018) &
-                    (bls_data["period"].str.strip() == "Q01"),
-                    ["series_id", "year", "period", "value"]
-                ]
+    if bls_best_years is None:
+        bls_best_years = best_years(bls_grouped)
 
     bls_census_merged_df = pd.merge(
         census_data,
-        bls_6032_q1,
+        bls_lookup,
         left_on="year",
         right_on="year",
         how="inner"
     )
 
-    return bls_census_merged_df
\ No newline at end of file
+    return {
+        "bls_census_stats": bls_census_merged_df,
+        "census_stats": census_stats,
+        "bls_best_years": bls_best_years
+    }
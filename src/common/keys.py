@@ -0,0 +1,18 @@
+# S3 key layouts written by ingestion and read by analytics, kept in one place
+# so the two Lambdas can never disagree on where a derived object lives
+
+def bls_cache_key(s3_bls: str, file_name: str) -> str:
+    """Analytics Parquet cache of a BLS file, dropped by ingestion when the file changes"""
+    return f"{s3_bls}/_cache/{file_name}.parquet"
+
+def census_parquet_key(s3_census: str) -> str:
+    """Typed copy ingestion stores next to a census JSON object"""
+    return f"{s3_census[:-len('.json')]}.parquet"
+
+def census_pointer_key(s3_census_prefix: str) -> str:
+    """Pointer to the newest census object, without a .json suffix so writing it triggers nothing"""
+    return f"{s3_census_prefix}_latest"
+
+def bls_manifest_key(s3_bls: str) -> str:
+    """Sync manifest ingestion keeps next to a survey's BLS files"""
+    return f"{s3_bls}/_manifest.json"
@@ -0,0 +1,129 @@
+import os, json, time, logging, threading
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Iterator, Optional
+
+# CONFIG
+NAMESPACE    = os.environ.get("metrics_namespace", "RearcDataQuest")
+METRICS_SINK = os.environ.get("metrics_sink", "emf" if os.environ.get("AWS_LAMBDA_FUNCTION_NAME") else "text")
+
+# Initiate logger
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+_DONE = object()
+
+class Metrics:
+    """Per-invocation stage timings, byte/row totals and counters, safe to update from worker threads"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self, function: str = "unknown") -> None:
+        with self._lock:
+            self.function = function
+            self.started = time.perf_counter()
+            self.stages: Dict[str, Dict[str, float]] = {}
+            self.counters: Dict[str, float] = {}
+
+    def _stage(self, stage: str) -> Dict[str, float]:
+        return self.stages.setdefault(stage, {"ms": 0.0, "calls": 0, "bytes": 0, "rows": 0})
+
+    @contextmanager
+    def timer(self, stage: str):
+        """Add the time spent in the block to a stage, summed across threads"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = (time.perf_counter() - start) * 1000
+            with self._lock:
+                entry = self._stage(stage)
+                entry["ms"] += elapsed
+                entry["calls"] += 1
+
+    def timed(self, stage: str, iterable: Iterable) -> Iterator:
+        """Yield from an iterable, charging only the time spent producing each item to a stage"""
+        iterator = iter(iterable)
+        while True:
+            with self.timer(stage):
+                item = next(iterator, _DONE)
+            if item is _DONE:
+                return
+            yield item
+
+    def add_bytes(self, stage: str, size: int) -> None:
+        with self._lock:
+            self._stage(stage)["bytes"] += size
+
+    def add_rows(self, stage: str, rows: int) -> None:
+        with self._lock:
+            self._stage(stage)["rows"] += rows
+
+    def count(self, name: str, value: float = 1) -> None:
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def summary(self) -> Dict[str, Any]:
+        """Flat metric values: <stage>_ms, _calls, _bytes, _rows, _bytes_per_sec plus counters"""
+        with self._lock:
+            values: Dict[str, Any] = {"total_ms": round((time.perf_counter() - self.started) * 1000, 1)}
+
+            for stage, entry in self.stages.items():
+                values[f"{stage}_ms"] = round(entry["ms"], 1)
+                values[f"{stage}_calls"] = entry["calls"]
+                if entry["bytes"]:
+                    values[f"{stage}_bytes"] = entry["bytes"]
+                    # Throughput per worker, since stage time is summed across threads
+                    if entry["ms"]:
+                        values[f"{stage}_bytes_per_sec"] = round(entry["bytes"] / (entry["ms"] / 1000))
+                if entry["rows"]:
+                    values[f"{stage}_rows"] = entry["rows"]
+
+            values.update(self.counters)
+            return values
+
+    def flush(self, sink: Optional[str] = None) -> Dict[str, Any]:
+        """Emit the invocation's metrics to the configured sink and return them"""
+        values = self.summary()
+
+        if (sink or METRICS_SINK) == "emf":
+            print(json.dumps(emf_document(self.function, values)), flush=True)
+        else:
+            logger.info(text_summary(self.function, values))
+
+        return values
+
+def unit_of(name: str) -> str:
+    if name.endswith("_bytes_per_sec"):
+        return "Bytes/Second"
+    if name.endswith("_ms"):
+        return "Milliseconds"
+    if name.endswith("_bytes"):
+        return "Bytes"
+    return "Count"
+
+def emf_document(function: str, values: Dict[str, Any]) -> Dict[str, Any]:
+    """CloudWatch Embedded Metric Format record, extracted into metrics from the log line"""
+    return {
+        "_aws": {
+            "Timestamp": int(time.time() * 1000),
+            "CloudWatchMetrics": [{
+                "Namespace": NAMESPACE,
+                "Dimensions": [["Function"]],
+                "Metrics": [{"Name": name, "Unit": unit_of(name)} for name in values][:100]
+            }]
+        },
+        "Function": function,
+        **values
+    }
+
+def text_summary(function: str, values: Dict[str, Any]) -> str:
+    """Plain-text table for local runs"""
+    width = max(len(name) for name in values)
+    lines = [f"{function} metrics:"]
+    lines += [f"  {name:<{width}}  {value:>14,} {unit_of(name)}" for name, value in values.items()]
+    return "\n".join(lines)
+
+# One recorder per container; each handler resets it at the start of an invocation
+metrics = Metrics()
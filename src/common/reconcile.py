@@ -0,0 +1,59 @@
+import os, logging
+from typing import Any, Dict, Iterable, Iterator, List
+from concurrent.futures import ThreadPoolExecutor
+from common.metrics import metrics
+
+# CONFIG
+DRY_RUN      = os.environ.get("reconcile_dry_run", "false").lower() == "true"
+DELETE_BATCH = 1000
+CONCURRENCY  = int(os.environ.get("delete_concurrency", "4"))
+
+# Initiate logger
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+def directory(prefix: str) -> str:
+    """Normalise a key prefix to a directory so bls/pr never matches bls/pr2/"""
+    return prefix.rstrip("/") + "/"
+
+def iter_objects(s3_client, bucket: str, prefix: str, recursive: bool = False) -> Iterator[Dict[str, Any]]:
+    """Every object in a directory across all list pages, nested directories only when recursive"""
+    params = {"Bucket": bucket, "Prefix": directory(prefix)}
+    if not recursive:
+        params["Delimiter"] = "/"
+
+    for page in s3_client.get_paginator("list_objects_v2").paginate(**params):
+        yield from page.get("Contents", [])
+
+def delete_keys(s3_client, bucket: str, keys: Iterable[str], dry_run: bool = DRY_RUN,
+                concurrency: int = CONCURRENCY) -> Dict[str, List[str]]:
+    """Delete keys in concurrent 1000-key batches, returning what was deleted and what failed"""
+    keys = list(keys)
+    result = {"deleted": [], "errors": []}
+
+    if dry_run:
+        for key in keys:
+            logger.info(f"DRY RUN, would delete: {key}")
+        return result
+
+    batches = [keys[start:start + DELETE_BATCH] for start in range(0, len(keys), DELETE_BATCH)]
+    if not batches:
+        return result
+
+    def delete_batch(batch: List[str]) -> Dict[str, Any]:
+        with metrics.timer("delete"):
+            return s3_client.delete_objects(
+                Bucket=bucket,
+                Delete={"Objects": [{"Key": key} for key in batch], "Quiet": False}
+            )
+
+    with ThreadPoolExecutor(max_workers=min(concurrency, len(batches))) as pool:
+        for response in pool.map(delete_batch, batches):
+            result["deleted"] += [obj["Key"] for obj in response.get("Deleted", [])]
+
+            # A batch can partially fail, each failed key is reported on its own
+            for error in response.get("Errors", []):
+                logger.error(f"Not able to delete {error['Key']}: {error.get('Code')} {error.get('Message')}")
+                result["errors"].append(error["Key"])
+
+    return result
@@ -0,0 +1,33 @@
+import importlib, threading
+from types import ModuleType
+from typing import Any, Dict, Optional
+
+# Clients live for the lifetime of the container and are shared by every invocation
+_clients: Dict[str, Any] = {}
+_clients_lock = threading.Lock()
+
+class LazyModule(ModuleType):
+    """Module placeholder that performs the real import on first attribute access"""
+
+    def __init__(self, name: str):
+        super().__init__(name)
+        self._module: Optional[ModuleType] = None
+
+    def __getattr__(self, attr: str) -> Any:
+        if self._module is None:
+            self._module = importlib.import_module(self.__name__)
+        return getattr(self._module, attr)
+
+def lazy_import(name: str) -> ModuleType:
+    """Defer importing a heavy library until the code path that needs it runs"""
+    return LazyModule(name)
+
+def get_client(service: str, config=None):
+    """Create a boto3 client once per container and reuse it"""
+
+    # boto3's default session is not thread-safe while creating clients
+    with _clients_lock:
+        if service not in _clients:
+            import boto3
+            _clients[service] = boto3.client(service, config=config)
+        return _clients[service]
@@ -0,0 +1,259 @@
+import os, io, logging, threading
+from typing import Any, Callable, Dict, Iterable, List, Optional
+from concurrent.futures import ThreadPoolExecutor
+from common.metrics import metrics
+
+# CONFIG
+PART_SIZE   = int(os.environ.get("upload_part_size", str(8 * 1024 * 1024)))
+CONCURRENCY = int(os.environ.get("upload_concurrency", "4"))
+
+# Initiate logger
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+class UploadPaused(Exception):
+    """Raised by upload_stream when asked to stop, carrying the state needed to resume"""
+
+    def __init__(self, state: Dict[str, Any]):
+        super().__init__(f"Upload paused after {state['size']} bytes")
+        self.state = state
+
+def upload_stream(s3_client, chunks: Iterable[bytes], bucket: str, key: str,
+                  part_size: int = PART_SIZE, concurrency: int = CONCURRENCY,
+                  resume: Optional[Dict[str, Any]] = None,
+                  should_stop: Optional[Callable[[], bool]] = None,
+                  commit: Optional[Callable[[], bool]] = None,
+                  copy_prefix: Optional[Dict[str, Any]] = None,
+                  **extra: Any) -> Dict[str, Any]:
+    """
+    Upload an iterable of byte chunks to S3 as concurrent multipart parts.
+    `resume` continues an upload paused by `should_stop`, with `chunks`
+    starting at the paused upload's size. `commit` runs once every chunk
+    is read; returning False discards the upload and raising aborts it.
+    `copy_prefix` ({"key", "size", "etag"}) starts the object with the first
+    `size` bytes of an existing object, copied inside S3 part by part.
+    """
+    buffer = bytearray()
+    upload = MultipartUpload(s3_client, bucket, key, concurrency, extra, resume)
+
+    try:
+        if copy_prefix:
+            for start in range(0, copy_prefix["size"], part_size):
+                upload.copy(copy_prefix["key"], start, start + part_size - 1, copy_prefix.get("etag"))
+
+        for chunk in chunks:
+            buffer += chunk
+
+            while len(buffer) >= part_size:
+                upload.submit(bytes(buffer[:part_size]))
+                del buffer[:part_size]
+
+                # Only whole parts survive a pause, the buffered tail is fetched again on resume
+                if should_stop is not None and should_stop():
+                    raise UploadPaused(upload.pause())
+
+        # Last chance to discard, e.g. when the content turned out to be unchanged
+        if commit is not None and not commit():
+            upload.abort()
+            return {"ETag": None, "parts": 0, "size": upload.size + len(buffer), "skipped": True}
+
+        # Anything smaller than one part goes up in a single request
+        if not upload.started:
+            return put_single(s3_client, bytes(buffer), bucket, key, extra)
+
+        if buffer:
+            upload.submit(bytes(buffer))
+        return upload.complete()
+
+    except UploadPaused:
+        raise
+
+    except BaseException:
+        upload.abort()
+        raise
+
+def upload_buffer(s3_client, buffer: io.BytesIO, bucket: str, key: str,
+                  part_size: int = PART_SIZE, concurrency: int = CONCURRENCY,
+                  **extra: Any) -> Dict[str, Any]:
+    """Upload an in-memory buffer using part-sized views instead of a full copy"""
+    view = buffer.getbuffer()
+
+    try:
+        if len(view) <= part_size:
+            return put_single(s3_client, BufferSlice(view), bucket, key, extra)
+
+        upload = MultipartUpload(s3_client, bucket, key, concurrency, extra)
+        try:
+            for start in range(0, len(view), part_size):
+                upload.submit(BufferSlice(view[start:start + part_size]))
+            return upload.complete()
+
+        except BaseException:
+            upload.abort()
+            raise
+
+    finally:
+        view.release()
+
+def put_single(s3_client, body, bucket: str, key: str, extra: Dict[str, Any]) -> Dict[str, Any]:
+    """Single PUT with a SHA-256 checksum for bodies smaller than one part"""
+    with metrics.timer("upload"):
+        response = s3_client.put_object(
+            Bucket=bucket,
+            Key=key,
+            Body=body,
+            ChecksumAlgorithm="SHA256",
+            **extra
+        )
+    metrics.add_bytes("upload", len(body))
+    return {"ETag": response.get("ETag"), "parts": 0, "size": len(body)}
+
+class BufferSlice(io.RawIOBase):
+    """Read-only file over a memoryview so parts are streamed without copying the buffer"""
+
+    def __init__(self, view: memoryview):
+        self._view = view
+        self._pos = 0
+
+    def __len__(self) -> int:
+        return len(self._view)
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def readinto(self, b) -> int:
+        n = max(0, min(len(b), len(self._view) - self._pos))
+        b[:n] = self._view[self._pos:self._pos + n]
+        self._pos += n
+        return n
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        base = {io.SEEK_SET: 0, io.SEEK_CUR: self._pos, io.SEEK_END: len(self._view)}[whence]
+        self._pos = base + offset
+        return self._pos
+
+    def tell(self) -> int:
+        return self._pos
+
+class MultipartUpload:
+    """Multipart upload that keeps at most `concurrency` parts in flight"""
+
+    def __init__(self, s3_client, bucket: str, key: str, concurrency: int, extra: Dict[str, Any],
+                 resume: Optional[Dict[str, Any]] = None):
+        self.s3_client = s3_client
+        self.bucket = bucket
+        self.key = key
+        self.extra = extra
+        self.upload_id: Optional[str] = resume["upload_id"] if resume else None
+        self.size = resume["size"] if resume else 0
+        self._parts: List[dict] = list(resume["parts"]) if resume else []
+        self._futures = []
+        self._slots = threading.BoundedSemaphore(concurrency)
+        self._pool = ThreadPoolExecutor(max_workers=concurrency)
+
+    @property
+    def started(self) -> bool:
+        return self.upload_id is not None
+
+    def submit(self, data) -> None:
+        self._queue(len(data), self._upload_part, data)
+
+    def copy(self, source_key: str, start: int, end: int, source_etag: Optional[str] = None) -> None:
+        """Add bytes start..end of an existing object in the bucket as the next part"""
+        self._queue(end - start + 1, self._copy_part, source_key, start, end, source_etag)
+
+    def _queue(self, size: int, send: Callable, *args: Any) -> None:
+        if self.upload_id is None:
+            response = self.s3_client.create_multipart_upload(
+                Bucket=self.bucket,
+                Key=self.key,
+                ChecksumAlgorithm="SHA256",
+                **self.extra
+            )
+            self.upload_id = response["UploadId"]
+
+        # Block the producer while every slot is busy so memory stays bounded
+        self._slots.acquire()
+        part_number = len(self._parts) + len(self._futures) + 1
+        self.size += size
+
+        future = self._pool.submit(send, part_number, *args)
+        future.add_done_callback(lambda _: self._slots.release())
+        self._futures.append(future)
+
+    def complete(self) -> Dict[str, Any]:
+        parts = self._parts + [future.result() for future in self._futures]
+        self._pool.shutdown()
+
+        response = self.s3_client.complete_multipart_upload(
+            Bucket=self.bucket,
+            Key=self.key,
+            UploadId=self.upload_id,
+            MultipartUpload={"Parts": parts}
+        )
+        logger.info(f"Uploaded {self.size} bytes in {len(parts)} parts to s3://{self.bucket}/{self.key}")
+        return {"ETag": response.get("ETag"), "parts": len(parts), "size": self.size}
+
+    def pause(self) -> Dict[str, Any]:
+        """Wait for the parts in flight and return the state `resume` takes, leaving the upload open"""
+        parts = self._parts + [future.result() for future in self._futures]
+        self._pool.shutdown()
+
+        logger.info(f"Paused multipart upload of s3://{self.bucket}/{self.key} after {len(parts)} parts")
+        return {"upload_id": self.upload_id, "parts": parts, "size": self.size}
+
+    def abort(self) -> None:
+        self._pool.shutdown(cancel_futures=True)
+
+        if self.upload_id is None:
+            return
+
+        try:
+            self.s3_client.abort_multipart_upload(Bucket=self.bucket, Key=self.key, UploadId=self.upload_id)
+            logger.info(f"Aborted multipart upload of s3://{self.bucket}/{self.key}")
+        except Exception as e:
+            logger.error(f"Not able to abort multipart upload {self.upload_id}: {e}")
+
+    def _upload_part(self, part_number: int, data) -> dict:
+        # S3 verifies the SHA-256 botocore computes for every part
+        with metrics.timer("upload"):
+            response = self.s3_client.upload_part(
+                Bucket=self.bucket,
+                Key=self.key,
+                UploadId=self.upload_id,
+                PartNumber=part_number,
+                Body=data,
+                ChecksumAlgorithm="SHA256"
+            )
+        metrics.add_bytes("upload", len(data))
+        return {
+            "PartNumber": part_number,
+            "ETag": response["ETag"],
+            "ChecksumSHA256": response.get("ChecksumSHA256")
+        }
+
+    def _copy_part(self, part_number: int, source_key: str, start: int, end: int,
+                   source_etag: Optional[str]) -> dict:
+        # The source is pinned to the ETag it was compared against, if given
+        pinned = {"CopySourceIfMatch": source_etag} if source_etag else {}
+
+        with metrics.timer("upload_copy"):
+            response = self.s3_client.upload_part_copy(
+                Bucket=self.bucket,
+                Key=self.key,
+                UploadId=self.upload_id,
+                PartNumber=part_number,
+                CopySource={"Bucket": self.bucket, "Key": source_key},
+                CopySourceRange=f"bytes={start}-{end}",
+                **pinned
+            )
+        metrics.add_bytes("upload_copy", end - start + 1)
+
+        result = response["CopyPartResult"]
+        part = {"PartNumber": part_number, "ETag": result["ETag"]}
+        if result.get("ChecksumSHA256"):
+            part["ChecksumSHA256"] = result["ChecksumSHA256"]
+        return part
@@ -1,198 +1,903 @@
-import os, boto3, requests, logging, json
+import os, io, re, requests, logging, json, threading, hashlib, codecs, posixpath, time, asyncio, itertools, tempfile
+from fnmatch import fnmatch
 from datetime import datetime, timezone
-from typing import Dict, Tuple, Optional, Any
-from requests import Session
-from bs4 import BeautifulSoup as bs
-from urllib.parse import urljoin
-from email.utils import parsedate_to_datetime
-from requests.exceptions import RequestException
+from typing import Dict, Optional, Any, Iterator, List, NamedTuple, Tuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+from requests import Session, Response
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from html.parser import HTMLParser
+from urllib.parse import urljoin, urlparse
+from botocore.config import Config
+from email.utils import format_datetime
+from requests.exceptions import HTTPError, RequestException
 from botocore.exceptions import ClientError
+from common.transfer import upload_stream, UploadPaused, CONCURRENCY, PART_SIZE
+from common.startup import get_client, lazy_import
+from common.metrics import metrics
+from common.reconcile import iter_objects, delete_keys
+from common.keys import bls_cache_key, bls_manifest_key, census_parquet_key, census_pointer_key
+
+# Only the census upload needs Arrow, so a BLS-only container never imports it
+pa = lazy_import("pyarrow")
+pq = lazy_import("pyarrow.parquet")
 
 # CONFIG
-UTC_DATE      = datetime.now(timezone.utc).date().isoformat()
 S3_BUCKET     = os.environ.get("s3_bucket")
 S3_BLS        = os.environ.get("s3_bls_key")
 S3_CENSUS_KEY = os.environ.get("s3_census_key")
-S3_CENSUS     = f"{S3_CENSUS_KEY}{UTC_DATE}/census.json"
 BLS_URL       = os.environ.get("bls_url")
+BLS_SURVEYS   = os.environ.get("bls_surveys", '["pr"]')
 CENSUS_URL    = os.environ.get("census_url")
 USER_AGENT    = os.environ.get("user_agent")
+MAX_WORKERS   = int(os.environ.get("max_workers", "8"))
+HOST_LIMIT    = int(os.environ.get("bls_host_limit", "4"))
+HTTP_RETRIES  = int(os.environ.get("http_retries", "3"))
+MARGIN_MS     = int(os.environ.get("deadline_margin_ms", "30000"))
+MAX_RESUMES   = int(os.environ.get("max_resumes", "10"))
+S3_CHECKPOINT = f"{posixpath.dirname(S3_BLS or '')}/_checkpoint.json"
+
+# Files kept in sync by block delta: fnmatch patterns, stored identity encoded
+DELTA_FILES   = json.loads(os.environ.get("bls_delta_files", "[]"))
+DELTA_PROBES  = int(os.environ.get("delta_probes", "4"))
+DELTA_REFRESH = int(os.environ.get("delta_full_every", "7"))
+
+# Every copied part but the last must be at least 5 MB
+DELTA_BLOCK   = max(PART_SIZE, 5 * 1024 * 1024)
+
+# Largest same-size file hashed in /tmp before uploading, bigger ones stream and discard at the end
+SPOOL_MAX     = int(os.environ.get("same_size_spool_bytes", str(4 * PART_SIZE)))
 
-# Initiate s3
-s3_client = boto3.client("s3")
-sns_client = boto3.client("sns")
+# S3 pool sized so every part of every sync worker gets its own connection
+s3_config = Config(max_pool_connections=MAX_WORKERS * CONCURRENCY)
 
 # Initiate logger
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
+# Size/date columns of IIS ("3/18/2025  8:30 AM  1234 <a>") and
+# Apache ("<a></a>  2025-03-18 08:30  1.2K") style directory listings
+IIS_ROW    = re.compile(r"(\d{1,2}/\d{1,2}/\d{4})\s+(\d{1,2}:\d{2})\s*([AP]M)\s+(\d+|<dir>)\s*$", re.I)
+APACHE_ROW = re.compile(r"^\s*(\d{4}-\d{2}-\d{2}\s+\d{2}:\d{2}(?::\d{2})?)\s+(\S+)")
+
+# Census fields every record must carry, checked while the response streams in
+CENSUS_FIELDS = ["Year", "Population", "Nation"]
+
+# Shared state for the concurrent BLS sync
+_stats_lock = threading.Lock()
+_manifest_lock = threading.Lock()
+_host_locks: Dict[str, threading.BoundedSemaphore] = {}
+_host_locks_guard = threading.Lock()
+_session: Optional[Session] = None
+_session_lock = threading.Lock()
+
+class Census(NamedTuple):
+    """Census response as received plus its validated records as columns"""
+    body: bytes
+    table: "pa.Table"
+
+class Survey(NamedTuple):
+    """One BLS time.series survey directory mirrored to its own S3 prefix"""
+    name: str
+    url: str
+    prefix: str
+    s3_key: str
+    include: List[str]
+    exclude: List[str]
+
+    @property
+    def manifest_key(self) -> str:
+        return bls_manifest_key(self.s3_key)
+
+    def wants(self, file_name: str) -> bool:
+        return (any(fnmatch(file_name, pattern) for pattern in self.include) and
+                not any(fnmatch(file_name, pattern) for pattern in self.exclude))
+
+class Checkpoint:
+    """Progress of a BLS pass that can span several invocations"""
+
+    def __init__(self, deadline: Optional[float] = None):
+        self.deadline = deadline
+        self.attempt = 0
+        self.paused = False
+        self.done: Dict[str, set] = {}
+        self.uploads: Dict[str, dict] = {}
+        self.changed: set = set()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, deadline: Optional[float] = None) -> "Checkpoint":
+        checkpoint = cls(deadline)
+        try:
+            response = get_s3().get_object(Bucket=S3_BUCKET, Key=S3_CHECKPOINT)
+            state = json.loads(response["Body"].read())
+            checkpoint.attempt = state.get("attempt", 0)
+            checkpoint.done = {name: set(files) for name, files in state.get("done", {}).items()}
+            checkpoint.uploads = state.get("uploads", {})
+            checkpoint.changed = set(state.get("changed", []))
+            logger.info(f"Resuming BLS sync, attempt {checkpoint.attempt}, {len(checkpoint.uploads)} uploads in flight")
+
+        except ClientError as e:
+            if e.response["Error"]["Code"] != "NoSuchKey":
+                raise
+
+        return checkpoint
+
+    def save(self) -> None:
+        with self._lock:
+            body = json.dumps({
+                "updated_at": datetime.now(timezone.utc).isoformat(),
+                "attempt": self.attempt,
+                "done": {name: sorted(files) for name, files in self.done.items()},
+                "uploads": self.uploads,
+                "changed": sorted(self.changed)
+            }).encode("utf-8")
+
+        get_s3().put_object(Bucket=S3_BUCKET, Key=S3_CHECKPOINT, Body=body, ContentType="application/json")
+        logger.info(f"Checkpoint written to {S3_CHECKPOINT}")
+
+    def clear(self) -> None:
+        """Forget a finished pass so the next run starts from the top"""
+
+        # Paused uploads of files that are no longer listed would otherwise never be completed
+        for s3_key, upload in self.uploads.items():
+            try:
+                get_s3().abort_multipart_upload(Bucket=S3_BUCKET, Key=s3_key, UploadId=upload["upload_id"])
+            except ClientError as e:
+                logger.error(f"Not able to abort multipart upload {upload['upload_id']}: {e}")
+
+        if self.attempt or self.done or self.uploads:
+            get_s3().delete_object(Bucket=S3_BUCKET, Key=S3_CHECKPOINT)
+
+    def expired(self) -> bool:
+        """True once the invocation is within the safety margin of its timeout"""
+        if self.deadline is not None and time.monotonic() >= self.deadline:
+            self.paused = True
+        return self.paused
+
+    def is_done(self, survey: str, file_name: str) -> bool:
+        with self._lock:
+            return file_name in self.done.get(survey, ())
+
+    def mark_done(self, survey: str, file_name: str) -> None:
+        with self._lock:
+            self.done.setdefault(survey, set()).add(file_name)
+
+    def take_upload(self, s3_key: str) -> Optional[dict]:
+        """Claim a paused upload; it is only stored again if it pauses again"""
+        with self._lock:
+            return self.uploads.pop(s3_key, None)
+
+    def pause_upload(self, s3_key: str, state: dict) -> None:
+        with self._lock:
+            self.uploads[s3_key] = state
+
+def deadline_of(context) -> Optional[float]:
+    """Monotonic time at which the sync stops so it can checkpoint before Lambda times out"""
+    if context is None or not hasattr(context, "get_remaining_time_in_millis"):
+        return None
+    return time.monotonic() + (context.get_remaining_time_in_millis() - MARGIN_MS) / 1000
+
+def get_s3():
+    """S3 client shared by every invocation in this container"""
+    return get_client("s3", s3_config)
+
+def get_lambda():
+    """Lambda client, only created when the sync re-invokes itself"""
+    return get_client("lambda")
+
+def get_sns():
+    """SNS client, only created when a failure has to be reported"""
+    return get_client("sns")
+
+def census_key() -> str:
+    """Today's census object key, evaluated per invocation so warm containers roll over at midnight"""
+    return f"{S3_CENSUS_KEY}{datetime.now(timezone.utc).date().isoformat()}/census.json"
+
+def census_fingerprint(table: "pa.Table") -> str:
+    """Hash of the census records that ignores formatting, field order and record order"""
+    records = sorted(json.dumps(record, sort_keys=True, separators=(",", ":")) for record in table.to_pylist())
+    return hashlib.sha256("\n".join(records).encode("utf-8")).hexdigest()
+
+def load_census_pointer() -> Dict[str, str]:
+    """Key and fingerprint of the last census upload, on any date"""
+    try:
+        response = get_s3().get_object(Bucket=S3_BUCKET, Key=census_pointer_key(S3_CENSUS_KEY))
+        return json.loads(response["Body"].read())
+    except ClientError as e:
+        if e.response["Error"]["Code"] != "NoSuchKey":
+            raise
+        logger.info("No census pointer found")
+    return {}
+
+def save_census_pointer(s3_census: str, fingerprint: str) -> None:
+    get_s3().put_object(
+        Bucket=S3_BUCKET,
+        Key=census_pointer_key(S3_CENSUS_KEY),
+        Body=json.dumps({"key": s3_census, "fingerprint": fingerprint}).encode("utf-8"),
+        ContentType="application/json"
+    )
+
+def load_surveys() -> List[Survey]:
+    """
+    Surveys listed in bls_surveys, e.g. ["pr", {"name": "cu", "exclude": ["*.AllItems"]}].
+    bls_url and s3_bls_key point at the pr survey, every survey lives next to it.
+    """
+    root_url = urljoin(BLS_URL, "../")
+    s3_root = posixpath.dirname(S3_BLS)
+    surveys = []
+
+    for entry in json.loads(BLS_SURVEYS):
+        if isinstance(entry, str):
+            entry = {"name": entry}
+        name = entry["name"]
+
+        surveys.append(Survey(
+            name=name,
+            url=urljoin(root_url, f"{name}/"),
+            prefix=f"{urlparse(root_url).path}{name}/{name}.",
+            s3_key=entry.get("s3_key") or posixpath.join(s3_root, name),
+            include=entry.get("include") or ["*"],
+            exclude=entry.get("exclude") or []
+        ))
+
+    return surveys
+
 def handler(event, context) -> Dict[str, Any]:
-    res = []
+    metrics.reset("client")
 
     try:
-        # BLS session
-        bls_session = create_session(True)
-        bls_res = import_to_s3(session=bls_session)
-        res.append({"BLS": bls_res})
-
-        # Census session
-        census_session = create_session(False)
-        payload = get_population(census_session)
-        validate_payload(payload)
-        census_res = import_to_s3(payload=payload)
-        res.append({"Census": census_res})
+        return asyncio.run(ingest(context))
+
+    except Exception as err:
+        logger.error(f"Handler failed: {err}")
 
         return {
-            "statusCode": 200,
+            "statusCode": 500,
             "body": json.dumps({
-                "message": "Import for BLS and census are complete",
-                "results": res
+                "message": "Handler failed",
+                "error": str(err),
+                "metrics": metrics.flush()
             })
         }
 
-    except Exception as err:
-        logger.error(f"Handler failed: {err}")
+async def ingest(context) -> Dict[str, Any]:
+    """Sync BLS and fetch census at the same time over one pooled session"""
+    res = []
+    session = get_session()
+    checkpoint = Checkpoint.load(deadline_of(context))
 
+    # Both sources block on I/O in worker threads. Either one failing still
+    # lets the other finish, so a BLS pass is never abandoned mid-upload
+    bls_res, payload = await asyncio.gather(
+        asyncio.to_thread(import_to_s3, session=session, checkpoint=checkpoint),
+        asyncio.to_thread(fetch_population, session),
+        return_exceptions=True
+    )
+    if isinstance(bls_res, BaseException):
+        raise bls_res
+    res.append({"BLS": bls_res})
+
+    # Census is written last so the report it triggers sees a finished BLS pass.
+    # The resumed run fetches census again, so a census failure does not stop it
+    if checkpoint.paused:
+        body = {
+            "message": "BLS sync checkpointed before the timeout",
+            "resumed": resume_later(context, checkpoint),
+            "results": res
+        }
+        if isinstance(payload, BaseException):
+            logger.error(f"Census fetch failed: {payload}")
+            body["error"] = str(payload)
+        return {"statusCode": 202, "body": json.dumps({**body, "metrics": metrics.flush()})}
+
+    if isinstance(payload, BaseException):
+        logger.error(f"Census fetch failed: {payload}")
         return {
             "statusCode": 500,
             "body": json.dumps({
-                "message": "Handler failed",
-                "error": str(err)
+                "message": "BLS sync complete, census fetch failed",
+                "error": str(payload),
+                "results": res,
+                "metrics": metrics.flush()
             })
         }
 
-def create_session(is_bls: bool) -> Session:
-    """Create and configure a requests.Session for Census or BLS"""
+    census_res = import_to_s3(payload=payload, bls_changed=report_changed(checkpoint))
+    res.append({"Census": census_res})
+
+    return {
+        "statusCode": 200,
+        "body": json.dumps({
+            "message": "Import for BLS and census are complete",
+            "results": res,
+            "metrics": metrics.flush()
+        })
+    }
+
+def report_changed(checkpoint: Checkpoint) -> bool:
+    """Whether the BLS pass, over every invocation it took, changed a survey the report reads"""
+    return any(survey.name in checkpoint.changed for survey in load_surveys() if survey.s3_key == S3_BLS)
+
+def resume_later(context, checkpoint: Checkpoint) -> bool:
+    """Invoke this function again asynchronously to continue a checkpointed pass"""
+    if context is None or checkpoint.attempt > MAX_RESUMES:
+        logger.info("Not re-invoking, the next scheduled run continues from the checkpoint")
+        return False
+
+    get_lambda().invoke(
+        FunctionName=context.invoked_function_arn,
+        InvocationType="Event",
+        Payload=json.dumps({"resume": checkpoint.attempt}).encode("utf-8")
+    )
+    logger.info(f"Re-invoked {context.function_name} to resume, attempt {checkpoint.attempt}")
+    return True
 
-    # Initial params for header later
+def create_session() -> Session:
+    """Create a requests.Session for BLS and Census with keep-alive pools and retries"""
+
+    # Initial params for header later, census requests drop the Referer
     params = {
         "User-Agent": USER_AGENT,
-        "Referer": BLS_URL if is_bls else ""
+        "Referer": BLS_URL
     }
 
     session = requests.Session()
     session.headers.update(params)
 
+    # Transient failures are retried with exponential backoff plus up to 0.5s of
+    # jitter, so the parallel workers do not retry in lockstep
+    retries = Retry(
+        total=HTTP_RETRIES,
+        backoff_factor=0.5,
+        backoff_jitter=0.5,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=["GET", "HEAD"],
+        raise_on_status=False
+    )
+
+    # One pool per host, each large enough for every sync worker plus the census fetch
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=MAX_WORKERS + 1, max_retries=retries)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+
     return session
 
-def check_source(session: Session, url: str) -> Tuple[Optional[int], Optional[datetime]]:
-    """Check size to compare if there are any changes or not"""
+def get_session() -> Session:
+    """Session shared by every invocation in this container, so warm starts reuse its connections"""
+    global _session
 
-    response = session.head(url, timeout=10)
-    response.raise_for_status()
+    with _session_lock:
+        if _session is None:
+            _session = create_session()
+        return _session
 
-    # If there are changes in content then we assign size to something, else return None
-    size = response.headers.get("Content-Length")
-    size = int(size) if size and size.isdigit() else None
+@contextmanager
+def host_slot(url: str):
+    """Limit the number of concurrent requests sent to a single host"""
+    host = urlparse(url).netloc
 
-    # If there are changes in dates then we assigned changes in lm, else return None
-    last = response.headers.get("Last-Modified")
-    last = (parsedate_to_datetime(last) if last else None)
+    with _host_locks_guard:
+        if host not in _host_locks:
+            _host_locks[host] = threading.BoundedSemaphore(HOST_LIMIT)
+        slot = _host_locks[host]
 
-    return size, last
+    with slot:
+        yield
 
-def get_population(session: Session) -> dict:
-    """Extract census api date"""
-    res = session.get(CENSUS_URL, timeout=20)
-    res.raise_for_status()
-    return res.json()
+def count(stats: dict, key: str) -> None:
+    """Increment a sync counter from any worker thread"""
+    with _stats_lock:
+        stats[key] += 1
 
-def validate_payload(payload: dict) -> dict:
-    """Validate census api data"""
-    if not isinstance(payload, dict):
-        raise ValueError("Payload is not a dictionary")
+class ListingParser(HTMLParser):
+    """Incremental extractor of (file_name, size, date) rows from a directory index"""
+
+    def __init__(self, base_url: str, prefix: str):
+        super().__init__(convert_charrefs=True)
+        self.base_url = base_url
+        self.prefix = prefix
+        self.rows: List[Tuple[str, Optional[int], Optional[str]]] = []
+        self._text = ""
+        self._pending = None
+        self._in_link = False
+
+    def handle_starttag(self, tag, attrs):
+        if tag != "a":
+            return
+
+        # Text since the previous link trails that link (Apache) and leads this one (IIS)
+        self._finish(self._text)
+        leading, self._text = self._text, ""
+        self._in_link = True
+
+        href = dict(attrs).get("href")
+        if href and urlparse(urljoin(self.base_url, href)).path.startswith(self.prefix):
+            self._pending = (href.split("/")[-1], leading)
+
+    def handle_endtag(self, tag):
+        if tag == "a":
+            self._in_link = False
+
+    def handle_data(self, data):
+        # Link labels are skipped so only the size/date columns are collected
+        if not self._in_link:
+            self._text += data
+
+    def close(self):
+        super().close()
+        self._finish(self._text)
+
+    def drain(self) -> Iterator[Tuple[str, Optional[int], Optional[str]]]:
+        rows, self.rows = self.rows, []
+        yield from rows
+
+    def _finish(self, trailing: str) -> None:
+        if self._pending is None:
+            return
+
+        file_name, leading = self._pending
+        self._pending = None
+        size, date = None, None
+
+        iis = IIS_ROW.search(leading)
+        apache = APACHE_ROW.search(trailing)
+        if iis:
+            # The marker may follow the time with no space ("8:30AM"), strptime needs one
+            date = datetime.strptime(f"{iis.group(1)} {iis.group(2)} {iis.group(3).upper()}", "%m/%d/%Y %I:%M %p")
+            size = iis.group(4)
+        elif apache:
+            date = datetime.fromisoformat(apache.group(1))
+            size = apache.group(2)
+
+        size = int(size) if size and size.isdigit() else None
+        self.rows.append((file_name, size, date.isoformat() if date else None))
+
+class CensusParser:
+    """
+    Incremental parser of a datausa response. Records of the top-level `data`
+    array are validated and collected column by column as text is fed in,
+    every other top-level value is decoded and dropped.
+    """
+
+    _MORE = object()
+
+    def __init__(self):
+        self.columns: Dict[str, list] = {}
+        self.rows = 0
+        self._decoder = json.JSONDecoder()
+        self._text = ""
+        self._pos = 0
+        self._state = "start"
+        self._key = None
+
+    def feed(self, text: str, final: bool = False) -> None:
+        self._text = self._text[self._pos:] + text
+        self._pos = 0
+
+        while self._step(final):
+            pass
+
+        if final and self._state != "done":
+            raise ValueError("Census response ended before the payload was complete")
+
+    def table(self) -> "pa.Table":
+        types = {"Year": pa.int64(), "Population": pa.int64(), "Nation": pa.string()}
+        return pa.table({name: pa.array(values, type=types.get(name)) for name, values in self.columns.items()})
+
+    def _step(self, final: bool) -> bool:
+        """Consume one token or value, False when more text is needed"""
+        pos = self._pos
+        while pos < len(self._text) and self._text[pos].isspace():
+            pos += 1
+        self._pos = pos
+        if pos == len(self._text) or self._state == "done":
+            return False
+
+        char = self._text[pos]
+        expected = {"start": "{", "colon": ":", "array": "["}.get(self._state)
+        if expected:
+            if char != expected:
+                raise ValueError(f"Census payload: expected {expected!r} at {char!r}")
+            self._pos += 1
+            self._state = {"start": "key", "colon": "value", "array": "records"}[self._state]
+            return True
+
+        # Separators and closing brackets of the top-level object and the data array
+        if char == ",":
+            self._pos += 1
+            return True
+        if self._state == "key" and char == "}":
+            self._pos += 1
+            self._state = "done"
+            return True
+        if self._state == "records" and char == "]":
+            self._pos += 1
+            self._state = "key"
+            return True
+
+        if self._state == "value" and self._key == "data":
+            self._state = "array"
+            return True
+
+        value = self._decode(final)
+        if value is self._MORE:
+            return False
+
+        if self._state == "key":
+            if not isinstance(value, str):
+                raise ValueError(f"Census payload: expected a key at {value!r}")
+            self._key, self._state = value, "colon"
+        elif self._state == "value":
+            self._state = "key"
+        else:
+            self._add(value)
+        return True
+
+    def _decode(self, final: bool) -> Any:
+        try:
+            value, end = self._decoder.raw_decode(self._text, self._pos)
+        except json.JSONDecodeError as e:
+            if final:
+                raise ValueError(f"Census payload is not valid JSON: {e}")
+            return self._MORE
+
+        # A number ending the buffer may continue in the next chunk
+        if end == len(self._text) and not final:
+            return self._MORE
+
+        self._pos = end
+        return value
+
+    def _add(self, record: Any) -> None:
+        """Validate one record and append its values to the columns"""
+        if not isinstance(record, dict):
+            raise ValueError(f"Census record {self.rows} is not an object")
+
+        year, population, nation = (record.get(field) for field in CENSUS_FIELDS)
+        if isinstance(year, str) and year.isdigit():
+            year = int(year)
+        if not isinstance(year, int) or isinstance(year, bool):
+            raise ValueError(f"Census record {self.rows} has an invalid Year: {year!r}")
+        if (not isinstance(population, (int, float)) or isinstance(population, bool) or
+                population < 0 or population != int(population)):
+            raise ValueError(f"Census record {self.rows} has an invalid Population: {population!r}")
+        if not isinstance(nation, str) or not nation:
+            raise ValueError(f"Census record {self.rows} has an invalid Nation: {nation!r}")
+
+        values = {**record, "Year": year, "Population": int(population)}
+        for name in values:
+            if name not in self.columns:
+                self.columns[name] = [None] * self.rows
+        for name, column in self.columns.items():
+            column.append(values.get(name))
+        self.rows += 1
+
+def iter_listing(session: Session, url: str, prefix: str) -> Iterator[Tuple[str, Optional[int], Optional[str]]]:
+    """Stream a directory index and yield (file_name, size, date) for matching links"""
+    parser = ListingParser(url, prefix)
+
+    with metrics.timer("listing"):
+        response = session.get(url, stream=True, timeout=20)
+
+    with response:
+        response.raise_for_status()
+        decoder = codecs.getincrementaldecoder(response.encoding or "utf-8")(errors="replace")
+
+        # Only fetching the index is timed, not the workers started per yielded row
+        for chunk in metrics.timed("listing", response.iter_content(chunk_size=64 * 1024)):
+            metrics.add_bytes("listing", len(chunk))
+            parser.feed(decoder.decode(chunk))
+            yield from parser.drain()
+
+        parser.feed(decoder.decode(b"", final=True))
+        parser.close()
+        yield from parser.drain()
+
+class HashingReader:
+    """File-like wrapper that hashes and counts bytes as they are read, optionally per fixed-size block"""
+
+    def __init__(self, raw, block_size: Optional[int] = None):
+        self.raw = raw
+        self.sha256 = hashlib.sha256()
+        self.size = 0
+        self.block_size = block_size
+        self._blocks: List[str] = []
+        self._block = hashlib.sha256()
+        self._block_fill = 0
+
+    def read(self, size: int = -1) -> bytes:
+        with metrics.timer("download"):
+            chunk = self.raw.read(size)
+        metrics.add_bytes("download", len(chunk))
+        self.sha256.update(chunk)
+        self.size += len(chunk)
+        if self.block_size:
+            self._hash_blocks(chunk)
+        return chunk
+
+    def read_exact(self, size: int) -> bytes:
+        """Read `size` bytes, fewer only at the end of the stream"""
+        data = bytearray()
+        while len(data) < size:
+            chunk = self.read(size - len(data))
+            if not chunk:
+                break
+            data += chunk
+        return bytes(data)
+
+    def block_hashes(self) -> List[str]:
+        """SHA-256 of every block read so far, the last one possibly partial"""
+        return self._blocks + ([self._block.hexdigest()] if self._block_fill else [])
+
+    def _hash_blocks(self, chunk: bytes) -> None:
+        view = memoryview(chunk)
+        while view:
+            take = min(len(view), self.block_size - self._block_fill)
+            self._block.update(view[:take])
+            self._block_fill += take
+            view = view[take:]
+
+            if self._block_fill == self.block_size:
+                self._blocks.append(self._block.hexdigest())
+                self._block, self._block_fill = hashlib.sha256(), 0
+
+    def chunks(self, size: int = 1024 * 1024) -> Iterator[bytes]:
+        while True:
+            chunk = self.read(size)
+            if not chunk:
+                return
+            yield chunk
+
+def load_manifest(survey: Survey) -> Dict[str, dict]:
+    """Load a survey's per-file sync manifest, keyed by file name"""
+    try:
+        response = get_s3().get_object(Bucket=S3_BUCKET, Key=survey.manifest_key)
+        return json.loads(response["Body"].read()).get("files", {})
+
+    except ClientError as e:
+        if e.response["Error"]["Code"] != "NoSuchKey":
+            raise
+        logger.info(f"No manifest found at {survey.manifest_key}")
+
+    return {}
+
+def save_manifest(survey: Survey, manifest: Dict[str, dict]) -> None:
+    """Rewrite the manifest in a single PUT so readers never see a partial file"""
+    body = json.dumps({
+        "updated_at": datetime.now(timezone.utc).isoformat(),
+        "files": manifest
+    }, sort_keys=True).encode("utf-8")
+
+    get_s3().put_object(
+        Bucket=S3_BUCKET,
+        Key=survey.manifest_key,
+        Body=body,
+        ContentType="application/json"
+    )
+    logger.info(f"Manifest for {survey.name} written with {len(manifest)} files")
+
+def check_source(session: Session, url: str, validators: Dict[str, str],
+                 extra_headers: Optional[Dict[str, str]] = None) -> Optional[Response]:
+    """Send a conditional GET, returning None when the source has not changed"""
+
+    headers = dict(extra_headers or {})
+    if validators.get("etag"):
+        headers["If-None-Match"] = validators["etag"]
+    if validators.get("last_modified"):
+        headers["If-Modified-Since"] = validators["last_modified"]
+
+    with metrics.timer("source_check"):
+        response = session.get(url, headers=headers, stream=True, timeout=20)
 
-    if "data" not in payload or not payload["data"]:
+    # 304 means the stored validators still match the source
+    if response.status_code == 304:
+        response.close()
+        return None
+
+    try:
+        response.raise_for_status()
+    except RequestException:
+        response.close()
+        raise
+
+    return response
+
+def resume_source(session: Session, url: str, upload: Dict[str, Any]) -> Tuple[Response, bool]:
+    """
+    Request the rest of a file after a paused upload. The second value is
+    False when the server sent the whole file instead, because it changed,
+    ignores ranges or changed its encoding.
+    """
+    headers = {
+        "Range": f"bytes={upload['size']}-",
+        "If-Range": upload.get("etag") or upload.get("last_modified") or ""
+    }
+
+    with metrics.timer("source_check"):
+        response = session.get(url, headers=headers, stream=True, timeout=20)
+
+    try:
+        response.raise_for_status()
+    except RequestException:
+        response.close()
+        raise
+
+    # Offsets refer to the encoded bytes, so they only line up with the same Content-Encoding
+    content_range = response.headers.get("Content-Range", "")
+    resumed = (response.status_code == 206 and
+               content_range.startswith(f"bytes {upload['size']}-") and
+               response.headers.get("Content-Encoding", "identity") == upload.get("encoding"))
+
+    if response.status_code == 206 and not resumed:
+        response.close()
+        with metrics.timer("source_check"):
+            response = session.get(url, stream=True, timeout=20)
+
+        try:
+            response.raise_for_status()
+        except RequestException:
+            response.close()
+            raise
+
+    return response, resumed
+
+def get_population(session: Session) -> Census:
+    """Stream the census api response, parsing and validating its records as they arrive"""
+    parser = CensusParser()
+    body = bytearray()
+
+    with host_slot(CENSUS_URL), metrics.timer("census_fetch"):
+        res = session.get(CENSUS_URL, headers={"Referer": None}, stream=True, timeout=20)
+
+        with res:
+            res.raise_for_status()
+            decoder = codecs.getincrementaldecoder("utf-8")()
+
+            for chunk in res.iter_content(chunk_size=64 * 1024):
+                body += chunk
+                parser.feed(decoder.decode(chunk))
+            parser.feed(decoder.decode(b"", final=True), final=True)
+
+    metrics.add_bytes("census_fetch", len(body))
+    metrics.add_rows("census_fetch", parser.rows)
+    return Census(bytes(body), parser.table())
+
+def fetch_population(session: Session) -> Census:
+    """Fetch and validate the census payload"""
+    return validate_payload(get_population(session))
+
+def validate_payload(payload: Census) -> Census:
+    """Validate census api data"""
+    if payload.table.num_rows == 0:
         raise ValueError("No data found in payload")
     return payload
 
-def import_to_s3(*, session: Session = None, payload: dict = None) -> Dict[str, Any]:
+def import_to_s3(*, session: Session = None, payload: Optional[Census] = None,
+                 checkpoint: Optional[Checkpoint] = None, bls_changed: bool = True) -> Dict[str, Any]:
     """Upload census or bls files to S3 bucket"""
 
     try:
         if payload:
-            try:
-                obj = s3_client.head_object(Bucket=S3_BUCKET, Key=S3_CENSUS)
-                logger.info(f"Census data exists in {S3_BUCKET}")
-            except ClientError as e:
-                logger.info(f"Payload does not exists in {S3_BUCKET}")
+            s3_census = census_key()
 
-            body = json.dumps(payload).encode("utf-8")
+            # An unchanged series is not stored again unless the report has new BLS
+            # data to pick up, since the census upload is what fires the report
+            fingerprint = census_fingerprint(payload.table)
+            latest = load_census_pointer()
+            if latest.get("fingerprint") == fingerprint and not bls_changed:
+                logger.info(f"Census and BLS data unchanged since {latest.get('key')}, skipping upload")
+                metrics.count("census_unchanged")
+                return {
+                    "statusCode": 200,
+                    "body": "Census data unchanged",
+                    "key": latest.get("key")
+                }
 
-            s3_client.put_object(
-                Bucket=S3_BUCKET,
-                Key=S3_CENSUS,
-                Body=body,
-                ContentType="application/json"
-            )
+            # Both copies carry the hash of the response, so a reader can tell
+            # whether the Parquet file belongs to the JSON object it was sent
+            sha256 = hashlib.sha256(payload.body).hexdigest()
+
+            buffer = io.BytesIO()
+            with metrics.timer("parquet_write"):
+                pq.write_table(payload.table, buffer, compression="zstd")
+            metrics.add_rows("parquet_write", payload.table.num_rows)
+
+            # The .json upload triggers the report, so the Parquet copy goes first
+            for key, body, content_type, metadata in [
+                (census_parquet_key(s3_census), buffer.getvalue(), "application/x-parquet", {"source-sha256": sha256}),
+                (s3_census, payload.body, "application/json", {"sha256": sha256}),
+            ]:
+                with metrics.timer("upload"):
+                    get_s3().put_object(
+                        Bucket=S3_BUCKET,
+                        Key=key,
+                        Body=body,
+                        ContentType=content_type,
+                        Metadata=metadata
+                    )
+                metrics.add_bytes("upload", len(body))
+            save_census_pointer(s3_census, fingerprint)
             logger.info("Successfully uploaded census data")
             return {
                 "statusCode": 200,
-                "body": "Census data uploaded"
+                "body": "Census data uploaded",
+                "key": s3_census
             }
 
         elif session:
-            response = session.get(BLS_URL, timeout=20)
-            response.raise_for_status()
-            soup = bs(response.text, "html.parser")
-
-            seen_file = set()
+            checkpoint = checkpoint or Checkpoint()
+            surveys = load_surveys()
+            manifests = {survey.name: load_manifest(survey) for survey in surveys}
+            has_manifest = {name: bool(manifest) for name, manifest in manifests.items()}
+            seen_files = {survey.name: set() for survey in surveys}
+            failed = []
             stats = {
-                "uploaded": 0,
-                "skipped": 0,
-                "deleted": 0,
-                "errors": 0,
+                survey.name: {"uploaded": 0, "skipped": 0, "deleted": 0, "errors": 0, "deferred": 0, "unchanged": 0, "delta": 0}
+                for survey in surveys
             }
 
-            for links in soup.select("a[href]"):
-                href = links["href"]
+            # Every survey shares one worker pool and one session, so the
+            # concurrency budget and the per-host limit cover the whole run
+            with ThreadPoolExecutor(max_workers=MAX_WORKERS) as pool:
+                futures = {}
+                for survey in surveys:
+                    try:
+                        for file_name, size, date in iter_listing(session, survey.url, survey.prefix):
+                            # Files not reached before the deadline are picked up by the resumed run
+                            if checkpoint.expired():
+                                break
+                            if not survey.wants(file_name):
+                                continue
+                            seen_files[survey.name].add(file_name)
+                            future = pool.submit(sync_file, session, survey, file_name, stats[survey.name],
+                                                 manifests[survey.name], (size, date), checkpoint)
+                            futures[future] = (survey, file_name)
 
-                if not href.startswith("/pub/time.series/pr/pr."):
-                    continue
+                    except RequestException as e:
+                        logger.error(f"Listing failed for {survey.name}: {e}")
+                        count(stats[survey.name], "errors")
+                        failed.append(survey.name)
 
-                file_name = href.split("/")[-1]
-                file_url = urljoin(BLS_URL, file_name)
-                s3_key = f"{S3_BLS}/{file_name}"
-                seen_file.add(file_name)
+                for future in as_completed(futures):
+                    survey, file_name = futures[future]
+                    try:
+                        future.result()
+                    except Exception as e:
+                        logger.error(f"Sync failed for {survey.name}/{file_name}: {e}")
+                        count(stats[survey.name], "errors")
 
-                # Retrieving size and last modified from source
-                try:
-                    src_size, src_last = check_source(session, file_url)
-                except RequestException as e:
-                    logger.error("Size and last modified not retrieved")
-                    stats["errors"] += 1
-                    continue
+            for survey in surveys:
+                manifest = manifests[survey.name]
 
-                # Retrieving size and last modified from S3
-                try:
-                    obj = s3_client.head_object(Bucket=S3_BUCKET, Key=s3_key)
-                    dst_size = obj["ContentLength"]
-                    dst_last = obj["LastModified"]
-
-                    if ((src_size is not None and dst_size == src_size) or
-                        (src_last and dst_last and src_last <= dst_last)):
-                        logger.info(f"No changes for {file_name}")
-                        stats["skipped"]+= 1
-                        continue
-                except ClientError as e:
-                    logger.info(f"{file_name} not found in {S3_BUCKET}")
-                    stats["errors"] += 1
+                # A partial listing or pass must never be taken as the set of files to keep
+                if survey.name not in failed and not checkpoint.paused:
+                    # Without a manifest yet the first run falls back to listing the prefix
+                    delete_files(survey, seen_files[survey.name], stats[survey.name],
+                                 manifest if has_manifest[survey.name] else None)
+                save_manifest(survey, manifest)
 
-                try:
-                    with session.get(file_url, stream=True, timeout=20) as res:
-                        res.raise_for_status()
-                        s3_client.upload_fileobj(res.raw, S3_BUCKET, s3_key)
-                        stats["uploaded"] += 1
-                        logger.info(f"Uploading {file_name} to {S3_BUCKET}")
+                for key, value in stats[survey.name].items():
+                    metrics.count(key, value)
+
+                # Remembered across resumed invocations, the census upload after the last one fires the report
+                if any(stats[survey.name][key] for key in ("uploaded", "delta", "deleted")):
+                    checkpoint.changed.add(survey.name)
 
-                except RequestException as e:
-                    logger.error(f"Not able to upload file: {e}")
-                    stats["errors"] += 1
+            if checkpoint.paused:
+                checkpoint.attempt += 1
+                checkpoint.save()
+            else:
+                checkpoint.clear()
+
+            if failed:
+                raise RuntimeError(f"Listing failed for surveys: {', '.join(failed)}")
 
-            delete_files(seen_file, stats)
             return {
                 "statusCode": 200,
-                "body": "BLS files uploaded"
+                "body": "BLS files uploaded",
+                "stats": stats
             }
         else:
             return {
@@ -211,7 +916,7 @@ def import_to_s3(*, session: Session = None, payload: dict = None) -> Dict[str,
                 'Subject': "Importing BLS Data to S3"
             }
 
-            sns_result = sns_client.publish(
+            sns_result = get_sns().publish(
                 TopicArn=os.environ.get("sns_topic_arn"),
                 Message=err_message,
                 Subject="Importing BLS/Census Data to S3"
@@ -231,40 +936,468 @@ def import_to_s3(*, session: Session = None, payload: dict = None) -> Dict[str,
             "body": err_message
         }
 
-def delete_files(seen_file: set, stats: dict) -> None:
-    """Delete from S3 if source does not match"""
+def sync_file(session: Session, survey: Survey, file_name: str, stats: dict, manifest: Dict[str, dict],
+              listing: Tuple[Optional[int], Optional[str]] = (None, None),
+              checkpoint: Optional[Checkpoint] = None) -> None:
+    """Check, compare and upload a single BLS file"""
+    file_url = urljoin(survey.url, file_name)
+    s3_key = f"{survey.s3_key}/{file_name}"
+    listing_size, listing_date = listing
+    checkpoint = checkpoint or Checkpoint()
+
+    # Finished earlier in this pass by an invocation that ran out of time
+    if checkpoint.is_done(survey.name, file_name):
+        count(stats, "skipped")
+        return
+
+    if checkpoint.expired():
+        count(stats, "deferred")
+        return
+
+    # A multipart upload paused by an earlier invocation continues from its last part
+    upload = checkpoint.take_upload(s3_key)
+    if upload is not None:
+        resume_file(session, survey, file_name, stats, manifest, listing, checkpoint, upload)
+        return
+
+    # Validators come from the manifest, S3 is only probed for files synced
+    # before the manifest existed
+    with _manifest_lock:
+        validators = dict(manifest.get(file_name) or {})
+
+    # Unchanged size and date in the directory listing needs no request at all
+    if (validators and listing_size is not None and listing_date and
+        validators.get("listing_size") == listing_size and
+        validators.get("listing_date") == listing_date):
+        logger.info(f"No changes for {file_name}")
+        count(stats, "skipped")
+        checkpoint.mark_done(survey.name, file_name)
+        return
+
+    if not validators:
+        try:
+            with metrics.timer("head"):
+                obj = get_s3().head_object(Bucket=S3_BUCKET, Key=s3_key)
+            validators["last_modified"] = format_datetime(obj["LastModified"].astimezone(timezone.utc), usegmt=True)
+            validators["sha256"] = stored_sha256(s3_key)
+            validators["size"] = obj["ContentLength"]
+        except ClientError as e:
+            logger.info(f"{file_name} not found in {S3_BUCKET}")
+
+    # Delta files are fetched unencoded so byte offsets stay stable as rows are appended
+    delta = any(fnmatch(file_name, pattern) for pattern in DELTA_FILES)
+    headers = {"Accept-Encoding": "identity"} if delta else {}
+    probe = delta_start(validators) if delta else None
+    if probe is not None:
+        headers["Range"] = f"bytes={probe}-"
+
+    try:
+        with host_slot(file_url):
+            try:
+                res = check_source(session, file_url, validators, headers)
+
+            except HTTPError:
+                # A failed probe, e.g. 416 once the source shrank below the last stored
+                # block, is never repeated as is: the full download records new blocks
+                if probe is None:
+                    raise
+                logger.info(f"Range probe of {file_name} failed, downloading it in full")
+                res = fetch_identity(session, file_url)
+
+            if res is None:
+                logger.info(f"No changes for {file_name}")
+                count(stats, "skipped")
+
+                record_file(manifest, file_name, file_url, {
+                    **validators,
+                    "listing_size": listing_size,
+                    "listing_date": listing_date
+                })
+                checkpoint.mark_done(survey.name, file_name)
+                return
+
+            if probe is not None and res.status_code == 206:
+                delta_file(session, survey, file_name, stats, manifest, listing, checkpoint, res, validators)
+                return
+
+            transfer_file(survey, file_name, stats, manifest, listing, checkpoint, res,
+                          previous_sha256=validators.get("sha256"), previous_size=validators.get("size"),
+                          block_size=DELTA_BLOCK if delta else None)
+
+    except RequestException as e:
+        logger.error(f"Not able to upload file: {e}")
+        count(stats, "errors")
+
+def resume_file(session: Session, survey: Survey, file_name: str, stats: dict, manifest: Dict[str, dict],
+                listing: Tuple[Optional[int], Optional[str]], checkpoint: Checkpoint, upload: dict) -> None:
+    """Continue a paused upload with a Range request for the bytes not yet uploaded"""
+    file_url = urljoin(survey.url, file_name)
+    s3_key = f"{survey.s3_key}/{file_name}"
+
+    try:
+        with host_slot(file_url):
+            res, resumed = resume_source(session, file_url, upload)
+
+            if not resumed:
+                logger.info(f"{file_name} cannot be resumed, uploading it again")
+                try:
+                    get_s3().abort_multipart_upload(Bucket=S3_BUCKET, Key=s3_key, UploadId=upload["upload_id"])
+                except ClientError as e:
+                    logger.error(f"Not able to abort multipart upload {upload['upload_id']}: {e}")
+
+            transfer_file(survey, file_name, stats, manifest, listing, checkpoint, res,
+                          upload if resumed else None)
 
-    files_to_delete = []
+    except RequestException as e:
+        logger.error(f"Not able to resume file: {e}")
+        count(stats, "errors")
 
+def transfer_file(survey: Survey, file_name: str, stats: dict, manifest: Dict[str, dict],
+                  listing: Tuple[Optional[int], Optional[str]], checkpoint: Checkpoint,
+                  res: Response, resume: Optional[dict] = None, previous_sha256: Optional[str] = None,
+                  previous_size: Optional[int] = None, block_size: Optional[int] = None) -> None:
+    """Stream a source response into S3, pausing at a part boundary when time runs out"""
+    file_url = urljoin(survey.url, file_name)
+    s3_key = f"{survey.s3_key}/{file_name}"
+    listing_size, listing_date = listing
+
+    # The validators of the first response stay authoritative for every resumed range
+    etag = resume["etag"] if resume else res.headers.get("ETag")
+    last_modified = resume["last_modified"] if resume else res.headers.get("Last-Modified")
+
+    if previous_sha256 is None:
+        with _manifest_lock:
+            previous = manifest.get(file_name) or {}
+        previous_sha256, previous_size = previous.get("sha256"), previous.get("size")
+
+    encoding = res.headers.get("Content-Encoding", "identity")
+
+    # A source the size of the stored copy is often the same bytes under a new timestamp.
+    # Only small ones are hashed up front, so every worker's spool together fits in /tmp
+    expected = res.headers.get("Content-Length")
+    same_size = (resume is None and previous_sha256 is not None and expected is not None and
+                 int(expected) == previous_size and int(expected) <= SPOOL_MAX)
+
+    with res, tempfile.SpooledTemporaryFile(max_size=PART_SIZE) as spool:
+        reader = HashingReader(res.raw, block_size if encoding == "identity" and not resume else None)
+        chunks, result = reader.chunks(), None
+
+        def commit() -> bool:
+            # res.raw is read undecoded, so its byte count must equal Content-Length
+            if expected is not None and reader.size != int(expected):
+                raise IOError(f"Truncated transfer of {file_name}: {reader.size} of {expected} bytes")
+
+            # Same bytes under a new timestamp, the stored object is left as it is
+            return resume is not None or reader.sha256.hexdigest() != previous_sha256
+
+        # Hashed in full before any part is sent, spilling to /tmp past one part
+        if same_size:
+            for chunk in chunks:
+                spool.write(chunk)
+
+                # Nothing is uploaded yet, so a stop leaves the whole file to the next invocation
+                if checkpoint.expired():
+                    count(stats, "deferred")
+                    return
+            spool.seek(0)
+            chunks = iter(lambda: spool.read(1024 * 1024), b"")
+            if not commit():
+                result = {"ETag": None, "parts": 0, "size": reader.size, "skipped": True}
+
+        try:
+            if result is None:
+                result = upload_stream(get_s3(), chunks, S3_BUCKET, s3_key,
+                                       part_size=block_size or PART_SIZE, resume=resume,
+                                       should_stop=checkpoint.expired, commit=commit)
+
+        except UploadPaused as paused:
+            checkpoint.pause_upload(s3_key, {
+                **paused.state,
+                "etag": etag,
+                "last_modified": last_modified,
+                "encoding": encoding
+            })
+            count(stats, "deferred")
+            return
+
+    # Hash state does not survive an invocation, so a resumed file has none
+    sha256 = None if resume else reader.sha256.hexdigest()
+
+    record_file(manifest, file_name, file_url, {
+        "size": result["size"],
+        "last_modified": last_modified,
+        "etag": etag,
+        "sha256": sha256,
+        "listing_size": listing_size,
+        "listing_date": listing_date,
+        "encoding": encoding,
+        "blocks": reader.block_hashes() if reader.block_size else None,
+        "block_size": reader.block_size
+    })
+    checkpoint.mark_done(survey.name, file_name)
+
+    if result.get("skipped"):
+        logger.info(f"Content of {file_name} is unchanged, upload discarded")
+        count(stats, "unchanged")
+        return
+
+    if sha256:
+        tag_sha256(s3_key, sha256)
+
+    # A new raw file makes the parsed analytics copy stale
+    invalidate_cache(survey, file_name)
+
+    count(stats, "uploaded")
+    logger.info(f"Uploading {file_name} to {S3_BUCKET}")
+
+def delta_start(validators: Dict[str, Any]) -> Optional[int]:
+    """Offset of the last stored block, None when the stored copy cannot seed a delta"""
+    blocks = validators.get("blocks")
+    if not blocks or validators.get("encoding") != "identity" or validators.get("deltas", 0) >= DELTA_REFRESH:
+        return None
+    return (len(blocks) - 1) * validators["block_size"]
+
+def range_start(res: Response) -> Optional[int]:
+    """First byte offset of an unencoded 206 response"""
+    match = re.match(r"bytes (\d+)-", res.headers.get("Content-Range", ""))
+    if res.status_code != 206 or not match or res.headers.get("Content-Encoding", "identity") != "identity":
+        return None
+    return int(match.group(1))
+
+def fetch_identity(session: Session, url: str) -> Response:
+    """Unranged GET of a delta file's plain bytes, for when no stored block can be reused"""
+    with metrics.timer("source_check"):
+        res = session.get(url, headers={"Accept-Encoding": "identity"}, stream=True, timeout=20)
+
+    try:
+        res.raise_for_status()
+    except RequestException:
+        res.close()
+        raise
+
+    return res
+
+def source_block(session: Session, url: str, headers: Dict[str, str], start: int, length: int) -> Optional[str]:
+    """SHA-256 of one byte range of the source, None when the server does not answer with that range"""
+    with metrics.timer("source_check"):
+        res = session.get(url, headers={**headers, "Range": f"bytes={start}-{start + length - 1}"},
+                          stream=True, timeout=20)
+
+    with res:
+        if range_start(res) != start:
+            return None
+        return hashlib.sha256(HashingReader(res.raw).read_exact(length)).hexdigest()
+
+def delta_file(session: Session, survey: Survey, file_name: str, stats: dict, manifest: Dict[str, dict],
+               listing: Tuple[Optional[int], Optional[str]], checkpoint: Checkpoint,
+               res: Response, stored: Dict[str, Any]) -> None:
+    """
+    Rebuild a changed file from the stored blocks the source still has, copied
+    inside S3, plus everything after them fetched with one Range request.
+    Changes are assumed to sit at the end of the file, i.e. appended or
+    recently revised rows. One earlier block per run is spot checked, and
+    every delta_full_every-th change is a full download.
+    """
+    file_url = urljoin(survey.url, file_name)
+    s3_key = f"{survey.s3_key}/{file_name}"
+    listing_size, listing_date = listing
+    blocks, block_size, size = stored["blocks"], stored["block_size"], stored["size"]
+    deltas = stored.get("deltas", 0)
+    etag, last_modified = res.headers.get("ETag"), res.headers.get("Last-Modified")
+    ranged = {"Accept-Encoding": "identity", "If-Range": etag or last_modified or ""}
+    index = len(blocks) - 1
+    last_length = size - index * block_size
+
+    # Copied parts come from the stored object, which must still be the one the blocks describe
+    try:
+        obj = get_s3().head_object(Bucket=S3_BUCKET, Key=s3_key)
+        stored_etag = obj["ETag"] if obj["ContentLength"] == size else None
+    except ClientError:
+        stored_etag = None
+
+    # The probe response starts at the last stored block and runs to the end of the source
+    reader = HashingReader(res.raw, block_size)
+    head = reader.read_exact(last_length) if range_start(res) == index * block_size else b""
+    matched_last = stored_etag is not None and hashlib.sha256(head).hexdigest() == blocks[index]
+    kept, skip, tail = 0, 0, None
+
+    if matched_last:
+        # A full last block is copied, a partial one is uploaded again with the new bytes after it
+        kept = index + 1 if last_length == block_size else index
+        skip = kept - index
+        tail = itertools.chain([head][skip:], reader.chunks())
+
+    elif stored_etag:
+        res.close()
+
+        # Walk back one block at a time to the newest block the source still has
+        for probe in range(index - 1, max(-1, index - 1 - DELTA_PROBES), -1):
+            digest = source_block(session, file_url, ranged, probe * block_size, block_size)
+            if digest is None:
+                break
+            if digest == blocks[probe]:
+                kept = probe + 1
+                break
+
+    # A change before the tail would go unnoticed, so one earlier block, rotating run by run, is compared too
+    spot = deltas % kept if kept else None
+    verified = index if matched_last else kept - 1
+    if spot is not None and spot != verified and source_block(
+            session, file_url, ranged, spot * block_size, block_size) != blocks[spot]:
+        logger.info(f"Block {spot} of {file_name} changed outside the tail")
+        kept, tail = 0, None
+
+    # Anything but the requested range, an error status included, means a full download
+    if kept and tail is None:
+        with metrics.timer("source_check"):
+            res = session.get(file_url, headers={**ranged, "Range": f"bytes={kept * block_size}-"},
+                              stream=True, timeout=20)
+        if range_start(res) == kept * block_size:
+            etag, last_modified = res.headers.get("ETag"), res.headers.get("Last-Modified")
+            reader = HashingReader(res.raw, block_size)
+            tail = reader.chunks()
+
+    if tail is None:
+        res.close()
+        logger.info(f"No stored blocks of {file_name} can be reused, downloading it in full")
+        res = fetch_identity(session, file_url)
+        transfer_file(survey, file_name, stats, manifest, listing, checkpoint, res, block_size=block_size)
+        return
+
+    # Every stored block still matches and nothing was appended, so there is nothing to copy
+    if matched_last and res.headers.get("Content-Length") == str(last_length):
+        res.close()
+        result = {"size": size, "skipped": True}
+
+    else:
+        with res:
+            def commit() -> bool:
+                expected = res.headers.get("Content-Length")
+                if expected is not None and reader.size != int(expected):
+                    raise IOError(f"Truncated transfer of {file_name}: {reader.size} of {expected} bytes")
+                return not (matched_last and reader.size == last_length)
+
+            result = upload_stream(get_s3(), tail, S3_BUCKET, s3_key, part_size=block_size, commit=commit,
+                                   copy_prefix={"key": s3_key, "size": kept * block_size, "etag": stored_etag})
+
+    # Reused block hashes plus the hashes of everything fetched after them
+    record_file(manifest, file_name, file_url, {
+        "size": result["size"],
+        "last_modified": last_modified,
+        "etag": etag,
+        "sha256": None,
+        "listing_size": listing_size,
+        "listing_date": listing_date,
+        "encoding": "identity",
+        "blocks": blocks[:kept] + reader.block_hashes()[skip:],
+        "block_size": block_size,
+        "deltas": deltas + 1
+    })
+    checkpoint.mark_done(survey.name, file_name)
+
+    if result.get("skipped"):
+        logger.info(f"Content of {file_name} is unchanged, upload discarded")
+        count(stats, "unchanged")
+        return
+
+    invalidate_cache(survey, file_name)
+    count(stats, "delta")
+    logger.info(f"Rebuilt {file_name} from {kept} stored blocks and {result['size'] - kept * block_size} new bytes")
+
+def stored_sha256(s3_key: str) -> Optional[str]:
+    """Content hash tagged on an object by an earlier sync"""
+    try:
+        tags = get_s3().get_object_tagging(Bucket=S3_BUCKET, Key=s3_key)["TagSet"]
+        return next((tag["Value"] for tag in tags if tag["Key"] == "sha256"), None)
+    except ClientError as e:
+        logger.error(f"Not able to read tags of {s3_key}: {e}")
+        return None
+
+def tag_sha256(s3_key: str, sha256: str) -> None:
+    """
+    Tag an object with the SHA-256 of its content. Metadata has to be known when
+    an upload starts, a streamed file's hash is only known once it is complete.
+    """
     try:
-        response = s3_client.list_objects_v2(Bucket=S3_BUCKET, Prefix=S3_BLS)
+        get_s3().put_object_tagging(
+            Bucket=S3_BUCKET,
+            Key=s3_key,
+            Tagging={"TagSet": [{"Key": "sha256", "Value": sha256}]}
+        )
+    except ClientError as e:
+        logger.error(f"Not able to tag {s3_key}: {e}")
 
-        for obj in response.get("Contents", []):
-            key = obj["Key"]
-            file_name = key.split("/")[-1]
+def invalidate_cache(survey: Survey, file_name: str) -> None:
+    """Drop the analytics Parquet cache derived from a BLS file"""
+    try:
+        get_s3().delete_object(Bucket=S3_BUCKET, Key=bls_cache_key(survey.s3_key, file_name))
+    except ClientError as e:
+        logger.error(f"Not able to invalidate cache for {file_name}: {e}")
 
-            if file_name not in seen_file:
-                files_to_delete.append({"Key": key})
+def record_file(manifest: Dict[str, dict], file_name: str, url: str, validators: Dict[str, Any]) -> None:
+    """Store the source validators and content hash of a synced file"""
+    with _manifest_lock:
+        manifest[file_name] = {
+            "url": url,
+            "size": validators.get("size"),
+            "last_modified": validators.get("last_modified"),
+            "etag": validators.get("etag"),
+            "sha256": validators.get("sha256"),
+            "listing_size": validators.get("listing_size"),
+            "listing_date": validators.get("listing_date"),
+            "encoding": validators.get("encoding"),
+            "blocks": validators.get("blocks"),
+            "block_size": validators.get("block_size"),
+            "deltas": validators.get("deltas", 0)
+        }
 
-        if files_to_delete:
-            s3_client.delete_objects(Bucket=S3_BUCKET, Delete={"Objects": files_to_delete})
-            for obj in files_to_delete:
-                logger.info(f"DELETED: {obj['Key']}")
-                stats["deleted"] += 1
+def delete_files(survey: Survey, seen_file: set, stats: dict, manifest: Optional[Dict[str, dict]] = None) -> None:
+    """Delete from S3 if source does not match"""
+
+    try:
+        if manifest:
+            # The manifest is the authoritative list of synced files
+            stale = [f"{survey.s3_key}/{name}" for name in manifest if name not in seen_file]
+        else:
+            # Only files directly in the survey directory, never _cache/ or a sibling like bls/pr2/
+            stale = [
+                obj["Key"]
+                for obj in iter_objects(get_s3(), S3_BUCKET, survey.s3_key)
+                if obj["Key"].split("/")[-1] not in seen_file
+                # Keys starting with "_" hold pipeline metadata, not BLS files
+                and not obj["Key"].split("/")[-1].startswith("_")
+            ]
+
+        result = delete_keys(get_s3(), S3_BUCKET, stale)
+        for key in result["deleted"]:
+            logger.info(f"DELETED: {key}")
+            stats["deleted"] += 1
+
+            if manifest is not None:
+                manifest.pop(key.split("/")[-1], None)
+
+        stats["errors"] += len(result["errors"])
 
     except ClientError as e:
         logger.error(f"Error in deleting files: {e}")
         stats["errors"] += 1
 
-def list_source_files(is_bls: bool) -> None:
+def list_source_files(is_bls: bool) -> List[str]:
     """Return existing files in S3"""
-    s3_key = S3_BLS if is_bls else S3_CENSUS_KEY
+    keys = []
 
     try:
-        response = s3_client.list_objects_v2(Bucket=S3_BUCKET, Prefix=s3_key)
+        if is_bls:
+            for survey in load_surveys():
+                keys += [obj["Key"] for obj in iter_objects(get_s3(), S3_BUCKET, survey.s3_key)]
+        else:
+            # Census files sit in one directory per run date
+            keys = [obj["Key"] for obj in iter_objects(get_s3(), S3_BUCKET, S3_CENSUS_KEY, recursive=True)]
 
-        for prefix in response.get("Contents", []):
-            logger.info(prefix["Key"])
+        for key in keys:
+            logger.info(key)
 
     except Exception as e:
         logger.info(f"Error listing s3 objects: {e}")
+
+    return keys
@@ -65,4 +65,5 @@ resource "aws_lambda_event_source_mapping" "census_sqs_to_analytics" {
   enabled                            = true
   batch_size                         = 10
   maximum_batching_window_in_seconds = 5
+  function_response_types            = ["ReportBatchItemFailures"]
 }
\ No newline at end of file
@@ -52,7 +52,10 @@ data "aws_iam_policy_document" "s3_bucket_lambda_policy_document" {
       "s3:ListBucket",
       "s3:GetObject",
       "s3:PutObject",
-      "s3:DeleteObject"
+      "s3:DeleteObject",
+      "s3:AbortMultipartUpload",
+      "s3:GetObjectTagging",
+      "s3:PutObjectTagging"
     ]
     resources = [
       aws_s3_bucket.client_s3_bucket["rearc"].arn,
@@ -69,6 +72,23 @@ resource "aws_iam_role_policy" "s3_lambda_role_policy" {
   policy   = data.aws_iam_policy_document.s3_bucket_lambda_policy_document[each.key].json
 }
 
+# Lets the ingestion Lambda re-invoke itself to resume a checkpointed BLS sync
+data "aws_iam_policy_document" "client_lambda_self_invoke_document" {
+  statement {
+    effect  = "Allow"
+    actions = ["lambda:InvokeFunction"]
+    resources = [
+      "arn:aws:lambda:*:${data.aws_caller_identity.current.account_id}:function:${local.clientLambda.ingestion.function_name}"
+    ]
+  }
+}
+
+resource "aws_iam_role_policy" "client_lambda_self_invoke_policy" {
+  name   = "ingestion_lambda_self_invoke_policy"
+  role   = aws_iam_role.client_iam_lambda_role["ingestion"].id
+  policy = data.aws_iam_policy_document.client_lambda_self_invoke_document.json
+}
+
 # SNS Publish Policy for Lambda
 data "aws_iam_policy_document" "client_lambda_sns_policy" {
   for_each = local.clientLambda
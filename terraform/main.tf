@@ -4,11 +4,14 @@ locals {
 
   clientData = {
     rearc = {
-      s3_bucket     = "rearc-raw-bucket"
-      s3_bls_key    = "bls/pr"
-      s3_census_key = "census/"
-      bls_url       = "https://download.bls.gov/pub/time.series/pr/"
-      census_url    = "https://honolulu-api.datausa.io/tesseract/data.jsonrecords?cube=acs_yg_total_population_1&drilldowns=Year%2CNation&locale=en&measures=Population"
+      s3_bucket       = "rearc-raw-bucket"
+      s3_bls_key      = "bls/pr"
+      bls_surveys     = ["pr"]
+      bls_delta_files = []
+      bls_lookups     = [{ series_id = "PRS30006032", year = 2018, period = "Q01" }]
+      s3_census_key   = "census/"
+      bls_url         = "https://download.bls.gov/pub/time.series/pr/"
+      census_url      = "https://honolulu-api.datausa.io/tesseract/data.jsonrecords?cube=acs_yg_total_population_1&drilldowns=Year%2CNation&locale=en&measures=Population"
     }
   }
 
@@ -103,8 +106,29 @@ resource "aws_lambda_function" "client_lambda" {
       "s3_bls_key" : local.clientData.rearc.s3_bls_key
       "s3_census_key" : local.clientData.rearc.s3_census_key
       "bls_url" : local.clientData.rearc.bls_url
+      "bls_surveys" : jsonencode(local.clientData.rearc.bls_surveys)
       "census_url" : local.clientData.rearc.census_url
       "user_agent" : local.user_agent
+      "max_workers" : 8
+      "deadline_margin_ms" : 30000
+      "max_resumes" : 10
+      "bls_host_limit" : 4
+      "http_retries" : 3
+      "bls_delta_files" : jsonencode(local.clientData.rearc.bls_delta_files)
+      "delta_probes" : 4
+      "delta_full_every" : 7
+      "bls_loader" : "arrow"
+      "bls_report_mode" : "memory"
+      "bls_cache" : "true"
+      "bls_lookups" : jsonencode(local.clientData.rearc.bls_lookups)
+      "analytics_backend" : "pandas"
+      "upload_part_size" : 8388608
+      "same_size_spool_bytes" : 33554432
+      "upload_concurrency" : 4
+      "s3_analytics_key" : "analytics"
+      "metrics_sink" : "emf"
+      "reconcile_dry_run" : "false"
+      "metrics_namespace" : "RearcDataQuest"
       "sns_topic_arn" : aws_sns_topic.client_notifications[each.key].arn
     }
   }